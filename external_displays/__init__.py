@@ -4,12 +4,21 @@
 # Authors:
 # Bardia Moshiri <bardia@furilabs.com>
 
-from .external_displays import ExternalDisplays
-from .keyboard_emulator import KeyboardEmulator
-from .touch_mouse_emulator import TouchMouseEmulator
-
 __all__ = [
     'ExternalDisplays',
     'KeyboardEmulator',
     'TouchMouseEmulator',
 ]
+
+# Import lazily so tools that only need edid/utils don't pull in GTK
+def __getattr__(name):
+    if name == 'ExternalDisplays':
+        from .external_displays import ExternalDisplays
+        return ExternalDisplays
+    if name == 'KeyboardEmulator':
+        from .keyboard_emulator import KeyboardEmulator
+        return KeyboardEmulator
+    if name == 'TouchMouseEmulator':
+        from .touch_mouse_emulator import TouchMouseEmulator
+        return TouchMouseEmulator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,94 +5,299 @@
 # Bardia Moshiri <bardia@furilabs.com>
 
 import os
+import errno
+import struct
+import functools
+import threading
+from collections import namedtuple
+
+# (card_path, connector) -> (status, edid mtime, manufacturer)
+# Treated as an immutable snapshot: readers never lock, writers swap in a copy
+_DISPLAY_CACHE = {}
+
+# Serializes cache writers and every use of the cached fds, get_display_info
+# is also polled from the service worker thread
+_CACHE_LOCK = threading.Lock()
+
+# connector sysfs directory -> open directory fd
+_DIR_FD_CACHE = {}
+# Errors from a cached directory fd whose directory is gone
+_STALE_ERRNOS = (errno.ENODEV, errno.ESTALE)
+
+# (connector sysfs directory, attribute) -> open fd, re-read in place with pread
+_FD_CACHE = {}
+
+# 5-bit compressed ASCII used by the EDID manufacturer id, 1 = 'A'
+_MFCT_CHARS = bytes(range(0x40, 0x60))
+
+MFCT_ID_OFFSET = 8
+
+_EDID_HEADER = b'\x00\xff\xff\xff\xff\xff\xff\x00'
+
+# Result of get_display_info, 'edid' is only filled in with full=True
+DisplayInfo = namedtuple('DisplayInfo', ['status', 'power_state', 'manufacturer', 'edid'], defaults=(None,))
+
+_NOT_FOUND = DisplayInfo('Not Found', 'Unknown', '')
+
+# Base EDID block layout, 128 bytes:
+# header, manufacturer id, product code, serial, week, year, version,
+# basic display parameters, chromaticity, established timings,
+# standard timings, 4 descriptors, extension count, checksum
+_EDID_STRUCT = struct.Struct('8s2s2s4sBB2sBBBBB10s3s16s18s18s18s18sBB')
 
 class Edid:
-    def __init__(self, edid_array):
-        # header information
-        self.header              = edid_array[0:8]
-        self.manufacturer_id     = edid_array[8:10]
-        self.product_code        = edid_array[10:12]
-        self.serial_no           = edid_array[12:16]
-        self.manufacture_week    = edid_array[16]
-        self.manufacture_year    = edid_array[17]
-        self.edid_version        = edid_array[18:20]
-        # basic display parameters [20-24]
-        self.input_params_bitmap = edid_array[20]
-        self.h_size_cm           = edid_array[21]
-        self.v_size_cm           = edid_array[22]
-        self.gamma               = edid_array[23]
-        self.features_bitmap     = edid_array[24]
-        # chromaticity co-ordinates [25-34]
-        self.chroma_coords       = edid_array[25:35]
-        # established timing bitmap [35-37]
-        self.est_timing_bitmap   = edid_array[35:38]
-        # standard timing information [38-53]
-        self.display_modes       = edid_array[38:54]
-        self.descriptor1         = edid_array[54:72]
-        self.descriptor2         = edid_array[72:90]
-        self.descriptor3         = edid_array[90:108]
-        self.descriptor4         = edid_array[108:126]
-        self.num_extensions      = edid_array[126]
-        self.checksum            = edid_array[127]
+    """Lazy view over a raw EDID block, fields are only unpacked when accessed"""
+    __slots__ = ('_mv', '_fields')
+
+    def __init__(self, edid_bytes):
+        self._mv = memoryview(edid_bytes)
+        self._fields = None
+
+    def _unpack(self):
+        if self._fields is None:
+            self._fields = _EDID_STRUCT.unpack_from(self._mv)
+        return self._fields
+
+    # header information
+    @property
+    def header(self):
+        return self._unpack()[0]
+
+    @property
+    def manufacturer_id(self):
+        # Hot path for get_display_info, hand back hashable bytes
+        return bytes(self._mv[MFCT_ID_OFFSET:MFCT_ID_OFFSET + 2])
+
+    @property
+    def product_code(self):
+        return self._unpack()[2]
+
+    @property
+    def serial_no(self):
+        return self._unpack()[3]
+
+    @property
+    def manufacture_week(self):
+        return self._unpack()[4]
+
+    @property
+    def manufacture_year(self):
+        return self._unpack()[5]
+
+    @property
+    def edid_version(self):
+        return self._unpack()[6]
+
+    # basic display parameters [20-24]
+    @property
+    def input_params_bitmap(self):
+        return self._unpack()[7]
+
+    @property
+    def h_size_cm(self):
+        return self._unpack()[8]
+
+    @property
+    def v_size_cm(self):
+        return self._unpack()[9]
+
+    @property
+    def gamma(self):
+        return self._unpack()[10]
+
+    @property
+    def features_bitmap(self):
+        return self._unpack()[11]
+
+    # chromaticity co-ordinates [25-34]
+    @property
+    def chroma_coords(self):
+        return self._unpack()[12]
+
+    # established timing bitmap [35-37]
+    @property
+    def est_timing_bitmap(self):
+        return self._unpack()[13]
+
+    # standard timing information [38-53]
+    @property
+    def display_modes(self):
+        return self._unpack()[14]
+
+    @property
+    def descriptor1(self):
+        return self._unpack()[15]
+
+    @property
+    def descriptor2(self):
+        return self._unpack()[16]
 
+    @property
+    def descriptor3(self):
+        return self._unpack()[17]
+
+    @property
+    def descriptor4(self):
+        return self._unpack()[18]
+
+    @property
+    def num_extensions(self):
+        return self._unpack()[19]
+
+    @property
+    def checksum(self):
+        return self._unpack()[20]
+
+@functools.lru_cache(maxsize=64)
 def parse_mfct_id(code):
-    id_hex = int(''.join(code), base=16)
-    char1 = chr(((id_hex >> 00) & (0x001F)) + 0x40)
-    char2 = chr(((id_hex >>  5) & (0x001F)) + 0x40)
-    char3 = chr(((id_hex >> 10) & (0x001F)) + 0x40)
-    return ''.join([char3, char2, char1])
+    id_val = (code[0] << 8) | code[1]
+    return bytes((
+        _MFCT_CHARS[(id_val >> 10) & 0x1F],
+        _MFCT_CHARS[(id_val >>  5) & 0x1F],
+        _MFCT_CHARS[ id_val        & 0x1F],
+    )).decode('ascii')
+
+def is_valid_edid(edid_bytes):
+    """Check the fixed header and that the block sums to 0 mod 256"""
+    return (len(edid_bytes) >= 128
+            and edid_bytes.startswith(_EDID_HEADER)
+            and sum(edid_bytes[:128]) & 0xFF == 0)
 
 def read_edid_file(filename):
     try:
         with open(filename, 'rb') as edid_file:
-            edid_raw = edid_file.read(128)  # Read only the first 128 bytes
-            edid_formatted = [f"{byte:02X}" for byte in edid_raw]
-        return edid_formatted
-    except Exception as e:
-        print(f"Error reading EDID file: {e}")
+            return edid_file.read(128)  # Read only the first 128 bytes
+    except OSError:
         return None
 
-def get_display_info(card_path="card1", connector="DVI-I-1"):
+def _dir_fd_replaced(base_path, dirfd):
+    """Whether base_path no longer names the directory dirfd was opened on"""
+    try:
+        current = os.stat(base_path)
+    except OSError:
+        return True
+    cached = os.fstat(dirfd)
+    return (current.st_dev, current.st_ino) != (cached.st_dev, cached.st_ino)
+
+def _at_dir_fd(base_path, func):
+    """Call func with the cached directory fd of base_path, called with _CACHE_LOCK held"""
+    dirfd = _DIR_FD_CACHE.get(base_path)
+    if dirfd is not None:
+        try:
+            return func(dirfd)
+        except OSError as e:
+            # A missing attribute in a live directory, like edid on some
+            # connectors, isn't a reason to reopen the directory
+            if e.errno not in _STALE_ERRNOS and not _dir_fd_replaced(base_path, dirfd):
+                raise
+            # The connector directory was removed, and maybe recreated
+            del _DIR_FD_CACHE[base_path]
+            os.close(dirfd)
+
+    dirfd = os.open(base_path, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+    _DIR_FD_CACHE[base_path] = dirfd
+    return func(dirfd)
+
+def _open_attr(base_path, name):
+    flags = os.O_RDONLY | os.O_CLOEXEC
+    return _at_dir_fd(base_path, lambda dirfd: os.open(name, flags, dir_fd=dirfd))
+
+def _stat_attr(base_path, name):
+    with _CACHE_LOCK:
+        return _at_dir_fd(base_path, lambda dirfd: os.stat(name, dir_fd=dirfd))
+
+def _pread(base_path, name, size, offset=0):
+    key = (base_path, name)
+    # Reads hold the lock too, otherwise another thread could close the fd,
+    # and the number be reused for an unrelated file, between lookup and pread
+    with _CACHE_LOCK:
+        fd = _FD_CACHE.get(key)
+        if fd is not None:
+            try:
+                return os.pread(fd, size, offset)
+            except OSError:
+                # Stale fd, the connector went away since we opened it
+                del _FD_CACHE[key]
+                os.close(fd)
+
+        fd = _open_attr(base_path, name)
+        _FD_CACHE[key] = fd
+        return os.pread(fd, size, offset)
+
+def _pread_attr(base_path, name):
+    return _pread(base_path, name, 64).decode().strip()
+
+def _store_display_cache(key, entry):
+    global _DISPLAY_CACHE
+    with _CACHE_LOCK:
+        snapshot = dict(_DISPLAY_CACHE)
+        snapshot[key] = entry
+        _DISPLAY_CACHE = snapshot
+
+def _read_manufacturer(base_path):
+    """Read and validate the base EDID block, then decode its manufacturer id"""
+    try:
+        edid_bytes = _pread(base_path, 'edid', 128)
+    except OSError:
+        return 'Error'
+
+    # Empty (disconnected) or corrupt reads would only decode to garbage
+    if not is_valid_edid(edid_bytes):
+        return ''
+    return parse_mfct_id(edid_bytes[MFCT_ID_OFFSET:MFCT_ID_OFFSET + 2])
+
+@functools.lru_cache(maxsize=16)
+def _connector_paths(card_path, connector):
+    base_path = f"/sys/class/drm/{card_path}/{card_path}-{connector}"
+    return base_path, f"{base_path}/edid"
+
+def get_display_info(card_path="card1", connector="DVI-I-1", full=False):
     """
     Get display information from sysfs
 
+    Args:
+        full: also parse the whole EDID block into the edid field
+
     Returns:
-        dict with status, power_state, and manufacturer information
+        DisplayInfo with status, power_state, and manufacturer information
     """
-    base_path = f"/sys/class/drm/{card_path}/{card_path}-{connector}"
-
-    if not os.path.exists(base_path):
-        return {
-            'status': 'Not Found',
-            'power_state': 'Unknown',
-            'manufacturer': ''
-        }
+    base_path, edid_path = _connector_paths(card_path, connector)
 
     try:
-        with open(f"{base_path}/status", 'r') as f:
-            status = f.read().strip()
-    except:
+        status = _pread_attr(base_path, 'status')
+    except FileNotFoundError:
+        return _NOT_FOUND
+    except OSError:
         status = 'Unknown'
 
     try:
-        with open(f"{base_path}/dpms", 'r') as f:
-            power_state = f.read().strip()
-    except:
+        power_state = _pread_attr(base_path, 'dpms')
+    except OSError:
         power_state = 'Unknown'
 
-    edid_path = f"{base_path}/edid"
-    if os.path.exists(edid_path):
-        edid_array = read_edid_file(edid_path)
-        if edid_array:
-            edid = Edid(edid_array)
-            manufacturer = parse_mfct_id(edid.manufacturer_id)
-        else:
-            manufacturer = 'Error'
+    try:
+        edid_mtime = _stat_attr(base_path, 'edid').st_mtime_ns
+    except OSError:
+        edid_mtime = None
+
+    # sysfs does not bump mtimes when the EDID blob changes, so the status is
+    # part of the key: any reconnect forces the EDID to be parsed again
+    key = (card_path, connector)
+    cached = _DISPLAY_CACHE.get(key)
+    if cached and cached[0] == status and cached[1] == edid_mtime:
+        manufacturer = cached[2]
     else:
-        manufacturer = ''
+        if edid_mtime is not None:
+            manufacturer = _read_manufacturer(base_path)
+        else:
+            manufacturer = ''
+
+        if manufacturer != 'Error':
+            _store_display_cache(key, (status, edid_mtime, manufacturer))
+
+    if full:
+        edid_array = read_edid_file(edid_path) if edid_mtime is not None else None
+        edid = Edid(edid_array) if edid_array and is_valid_edid(edid_array) else None
+        return DisplayInfo(status, power_state, manufacturer, edid)
 
-    return {
-        'status': status,
-        'power_state': power_state,
-        'manufacturer': manufacturer
-    }
+    return DisplayInfo(status, power_state, manufacturer)
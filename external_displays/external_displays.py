@@ -7,20 +7,22 @@
 import gi
 import os
 import time
-import glob
 import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, GLib, Adw, Gio
 
 from Xlib import display
+from Xlib.ext import randr
 
 from external_displays.edid import get_display_info
 from external_displays.keyboard_emulator import KeyboardEmulator
 from external_displays.touch_mouse_emulator import TouchMouseEmulator
-from external_displays.utils import check_service_status, start_service, stop_service, wait_for_file, wait_for_display_connected
+from external_displays.xdo import Xdo
+from external_displays.utils import get_settings, check_services_status, start_service, stop_service, wait_for_file, wait_for_display_connected, open_uevent_monitor, parse_uevent
 
 class ExternalDisplays(Adw.Application):
     def __init__(self, **kwargs):
@@ -31,17 +33,40 @@ class ExternalDisplays(Adw.Application):
         self.target_display = os.environ.get('DISPLAY', ':1')
         self.card_path = "card1"
         self.connector = self.detect_connector()
+        self.update_connector_paths()
         self.enable_file_path = os.path.expanduser("~/.enable_external_display")
+        # Only this process manages the marker, so track it in memory
+        self.enable_marker_state = os.path.exists(self.enable_file_path)
 
         # Input device management
-        self.input_device_buttons = []
-        self.input_device_rows = []
-
-        # Display mode management
-        self.mode_radio_buttons = {}
-        self.mode_radio_handlers = {}
-
-        # Flag to track if focus regain is active
+        self.input_settings = self.load_input_settings()
+        self.selected_input_paths = None
+        if self.input_settings is not None:
+            self.input_settings.connect("changed::input-paths", self.on_input_paths_changed)
+        self.input_paths_commit_source_id = None
+        # (device name, real path) -> (row, checkbox, toggled handler id)
+        self.input_device_entries = {}
+        # Keys of the entries whose checkbox is active
+        self.active_input_devices = set()
+        self.input_placeholder_row = None
+
+        # Persistent X connection, reopened lazily after errors. The current
+        # resolution is cached until RandR reports a change on it
+        self.x_display = None
+        self.x_display_source_id = None
+        self.current_resolution = None
+        self.current_resolution_valid = False
+        # RandR output last found for the connector, rechecked on every use
+        self.randr_output = None
+
+        # Display mode management, the combo row lists display_modes in order
+        self.modes_model = None
+        # Set while the combo is synced to the current mode, so it doesn't apply it
+        self.mode_selection_updating = False
+        self.display_modes = None
+
+        # Focus regain is active while the window has focus, the source
+        # is a pending one-shot that hands focus back to the drawing area
         self.focus_regain_active = False
         self.focus_regain_source_id = None
 
@@ -59,30 +84,47 @@ class ExternalDisplays(Adw.Application):
         # Switches and controls
         self.display_services_switch = None
 
+        # Settings sheet inputs
+        self.sensitivity_slider = None
+        self.display_input = None
+        self.connector_input = None
+        self.card_input = None
+
         # Labels for display info
         self.status_value = None
         self.power_value = None
         self.mfg_value = None
         self.display_info_labels = {}
+        self.last_display_info = None
 
-        # Expander rows
-        self.modes_expander = None
+        # Mode combo and inputs expander rows
+        self.modes_combo = None
         self.inputs_expander = None
 
-        # Emulators
+        # Emulators, both send their input through the shared xdo session
+        self.xdo = Xdo()
         self.keyboard_emulator = None
         self.touch_mouse_emulator = None
+        # Sensitivity applied before the emulator was created
+        self.touch_sensitivity = None
 
         # Controllers
         self.key_controller = None
-        self.config_page_key_controller = None
 
-        # Refresh timer
+        # Hotplug monitoring, the refresh timer is only a fallback
+        # for when the uevent socket can't be opened
+        self.uevent_socket = None
+        self.uevent_source_id = None
+        self.display_services_enabled = False
         self.refresh_timeout_id = None
 
         # Progress dialog
         self.progress_dialog = None
 
+        # Only one toast is kept on screen, toast_shown tracks whether it still is
+        self.toast = None
+        self.toast_shown = False
+
     def detect_connector(self):
         default_connector = "DVI-I-1"
         default_path = f"/sys/class/drm/{self.card_path}/{self.card_path}-{default_connector}"
@@ -90,18 +132,26 @@ class ExternalDisplays(Adw.Application):
         if os.path.exists(default_path):
             return default_connector
 
-        pattern = f"/sys/class/drm/{self.card_path}/{self.card_path}-DVI-I-*"
-        matching_paths = glob.glob(pattern)
+        # The connector names are a plain prefix match, no need for glob
+        prefix = f"{self.card_path}-DVI-I-"
+        try:
+            with os.scandir(f"/sys/class/drm/{self.card_path}") as it:
+                matching_names = sorted(entry.name for entry in it if entry.name.startswith(prefix))
+        except OSError:
+            matching_names = []
 
-        if matching_paths:
-            basename = os.path.basename(matching_paths[0])
-            connector = basename.split('-', 1)[1]
+        if matching_names:
+            connector = matching_names[0].split('-', 1)[1]
             print(f"Default connector not found. Using: {connector}")
             return connector
 
         print(f"No DVI-I connectors found. Falling back to default: {default_connector}")
         return default_connector
 
+    def update_connector_paths(self):
+        self.connector_sysfs_path = f"/sys/class/drm/{self.card_path}/{self.card_path}-{self.connector}"
+        self.modes_path = f"{self.connector_sysfs_path}/modes"
+
     def on_activate(self, app):
         self.win = Adw.ApplicationWindow(application=app)
         self.win.connect("close-request", lambda _: exit(0))
@@ -206,149 +256,233 @@ class ExternalDisplays(Adw.Application):
         self.status_label.set_margin_top(5)
         self.input_page.append(self.status_label)
 
-        self.create_main_content()
-        self.create_settings_content()
+        # The input page is only built the first time it is shown
+        self.stack.connect("notify::visible-child-name", self.on_visible_page_changed)
+        # Not needed until the sheet is first opened, build it once the window is up
+        GLib.idle_add(self.create_settings_content, priority=GLib.PRIORITY_LOW)
 
-        self.create_config_page()
+        services_status = check_services_status(
+            ("displaylink-driver.service", "external-display-display-server.service"),
+            system_bus=True
+        )
+        services_enabled = all(services_status.values())
 
-        displaylink_active = check_service_status("displaylink-driver.service", system_bus=True)
-        display_server_active = check_service_status("external-display-display-server.service", system_bus=True)
-        services_enabled = displaylink_active and display_server_active
+        self.create_config_page(services_enabled)
 
-        if services_enabled and not os.path.exists(self.enable_file_path):
-            try:
-                open(self.enable_file_path, 'a').close()
-            except Exception as e:
-                print(f"Error creating enable file at startup: {e}")
-        elif not services_enabled and os.path.exists(self.enable_file_path):
-            try:
-                os.remove(self.enable_file_path)
-            except Exception as e:
-                print(f"Error removing enable file at startup: {e}")
+        self.set_enable_marker(services_enabled)
 
+        self.start_uevent_monitor()
         self.update_display_ui_state(services_enabled)
 
-        self.refresh_timeout_id = None
-        if services_enabled:
-            self.refresh_timeout_id = GLib.timeout_add_seconds(5, self.refresh_display_info)
-
-        # Regain focus periodically (this is a hack)
-        GLib.timeout_add(1000, self.regain_focus)
+        # Key events from both pages bubble up to this one window controller,
+        # which doesn't forward them while the settings sheet or a dialog is open
+        self.connect_key_controller()
 
         initial_tab = self.stack.get_visible_child_name()
         if initial_tab == "input":
-            self.connect_key_controller()
+            self.create_main_content()
 
         self.win.present()
 
+    def start_uevent_monitor(self):
+        self.uevent_socket = open_uevent_monitor()
+        if self.uevent_socket is None:
+            return
+
+        self.uevent_source_id = GLib.unix_fd_add_full(
+            GLib.PRIORITY_DEFAULT,
+            self.uevent_socket.fileno(),
+            GLib.IOCondition.IN,
+            self.on_uevent
+        )
+
+    def on_uevent(self, fd, condition):
+        refresh_display = False
+        reload_inputs = False
+
+        # Drain everything queued so a burst of events causes a single refresh
+        while True:
+            try:
+                data = self.uevent_socket.recv(16384)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # Most likely ENOBUFS, we lost events so refresh everything
+                print(f"Error reading uevent: {e}")
+                refresh_display = True
+                reload_inputs = True
+                break
+
+            event = parse_uevent(data)
+            subsystem = event.get('SUBSYSTEM')
+            if subsystem == 'drm':
+                device = os.path.basename(event.get('DEVPATH', ''))
+                if device == self.card_path or device.startswith(f"{self.card_path}-"):
+                    refresh_display = True
+            elif subsystem == 'input':
+                reload_inputs = True
+
+        if refresh_display and self.display_services_enabled:
+            self.refresh_display_info()
+
+        if reload_inputs:
+            self.load_input_devices()
+
+        return GLib.SOURCE_CONTINUE
+
     def load_input_devices(self):
-        if not hasattr(self, 'inputs_expander'):
+        if self.inputs_expander is None:
             return
 
-        # Remove all existing rows that we previously added
-        if hasattr(self, 'input_device_rows'):
-            for row in self.input_device_rows:
-                self.inputs_expander.remove(row)
-            self.input_device_rows.clear()
-        else:
-            self.input_device_rows = []
+        # gsettings doesn't have a toggle still waiting on the debounce, write it
+        # now so the resync below doesn't revert the checkbox and lose the click
+        if self.input_paths_commit_source_id is not None:
+            GLib.source_remove(self.input_paths_commit_source_id)
+            self.commit_input_paths()
 
-        try:
-            settings = Gio.Settings.new('io.furios.input-redirector')
-            current_paths = settings.get_string('input-paths')
-            selected_paths = set(current_paths.split(',')) if current_paths else set()
-        except Exception as e:
-            print(f"Error reading input paths from gsettings: {e}")
-            selected_paths = set()
+        selected_paths = self.get_selected_input_paths()
 
-        self.input_device_buttons = []
+        # (device name, real path) of every event device currently present
+        devices = []
+        placeholder = None
 
         try:
             devices_path = "/dev/input/by-id"
             if os.path.exists(devices_path):
-                devices = sorted(os.listdir(devices_path))
+                # Only include event devices (skip js devices)
+                with os.scandir(devices_path) as it:
+                    names = sorted(entry.name for entry in it if 'event' in entry.name)
+
+                for device in names:
+                    try:
+                        # by-id entries are single hop relative links into /dev/input
+                        link = os.readlink(os.path.join(devices_path, device))
+                        devices.append((device, os.path.normpath(os.path.join(devices_path, link))))
+                    except Exception as e:
+                        print(f"Error processing device {device}: {e}")
+                        continue
 
                 if not devices:
-                    no_devices_row = Adw.ActionRow()
-                    no_devices_row.set_title("No input devices found")
-                    self.inputs_expander.add_row(no_devices_row)
-                    self.input_device_rows.append(no_devices_row)
-                else:
-                    for device in devices:
-                        device_path = os.path.join(devices_path, device)
-
-                        # Only include event devices (skip js devices)
-                        if 'event' in device:
-                            try:
-                                real_path = os.path.realpath(device_path)
-
-                                device_row = Adw.ActionRow()
-                                device_row.set_title(device)
-                                device_row.set_subtitle(real_path)
-
-                                checkbox = Gtk.CheckButton()
-                                checkbox.set_active(real_path in selected_paths)
-                                checkbox.connect("toggled", self.on_input_device_toggled)
-
-                                self.input_device_buttons.append((checkbox, real_path))
-                                device_row.add_prefix(checkbox)
-                                self.inputs_expander.add_row(device_row)
-                                self.input_device_rows.append(device_row)
-                            except Exception as e:
-                                print(f"Error processing device {device}: {e}")
-                                continue
+                    placeholder = "No input devices found"
             else:
-                no_devices_row = Adw.ActionRow()
-                no_devices_row.set_title("Input devices directory not found")
-                self.inputs_expander.add_row(no_devices_row)
-                self.input_device_rows.append(no_devices_row)
+                placeholder = "Input devices directory not found"
         except Exception as e:
             print(f"Error listing input devices: {e}")
-            error_row = Adw.ActionRow()
-            error_row.set_title("Error loading input devices")
-            self.inputs_expander.add_row(error_row)
-            self.input_device_rows.append(error_row)
+            devices = []
+            placeholder = "Error loading input devices"
+
+        self.set_input_placeholder(placeholder)
+
+        # Only touch the rows of devices that appeared or went away
+        present = set(devices)
+        for key in list(self.input_device_entries):
+            if key not in present:
+                row, checkbox, handler_id = self.input_device_entries.pop(key)
+                self.inputs_expander.remove(row)
+                self.active_input_devices.discard(key)
+
+        for key in devices:
+            device, real_path = key
+            active = real_path in selected_paths
+            entry = self.input_device_entries.get(key)
+
+            if entry is None:
+                device_row = Adw.ActionRow()
+                device_row.set_title(device)
+                device_row.set_subtitle(real_path)
+
+                checkbox = Gtk.CheckButton()
+                checkbox.set_active(active)
+                handler_id = checkbox.connect("toggled", self.on_input_device_toggled, key)
+
+                device_row.add_prefix(checkbox)
+                self.inputs_expander.add_row(device_row)
+                self.input_device_entries[key] = (device_row, checkbox, handler_id)
+            else:
+                device_row, checkbox, handler_id = entry
+                if checkbox.get_active() != active:
+                    checkbox.handler_block(handler_id)
+                    checkbox.set_active(active)
+                    checkbox.handler_unblock(handler_id)
+
+            if active:
+                self.active_input_devices.add(key)
+            else:
+                self.active_input_devices.discard(key)
+
+    def get_selected_input_paths(self):
+        # Cached until gsettings reports a change to input-paths
+        if self.selected_input_paths is None:
+            selected_paths = frozenset()
+            if self.input_settings is not None:
+                try:
+                    current_paths = self.input_settings.get_string('input-paths')
+                    selected_paths = frozenset(path for path in current_paths.split(',') if path)
+                except Exception as e:
+                    print(f"Error reading input paths from gsettings: {e}")
+            self.selected_input_paths = selected_paths
+        return self.selected_input_paths
+
+    def on_input_paths_changed(self, settings, key):
+        self.selected_input_paths = None
+
+    def set_input_placeholder(self, title):
+        if self.input_placeholder_row is not None:
+            if self.input_placeholder_row.get_title() == title:
+                return
+            self.inputs_expander.remove(self.input_placeholder_row)
+            self.input_placeholder_row = None
+
+        if title:
+            self.input_placeholder_row = Adw.ActionRow()
+            self.input_placeholder_row.set_title(title)
+            self.inputs_expander.add_row(self.input_placeholder_row)
 
     def on_refresh_clicked(self, button):
         # Refresh display information
-        if hasattr(self, 'display_info_labels'):
+        if self.display_info_labels:
             display_info = get_display_info(self.card_path, self.connector)
-            for key, value in display_info.items():
-                if key in self.display_info_labels:
-                    self.display_info_labels[key].set_text(value)
+            self.set_display_info_labels(display_info)
 
-        # Refresh current resolution in display modes
-        current_resolution = self.get_current_resolution()
-        if current_resolution and current_resolution in self.mode_radio_buttons:
-            button = self.mode_radio_buttons[current_resolution]
-            if not button.get_active():
-                if current_resolution in self.mode_radio_handlers:
-                    handler_id = self.mode_radio_handlers[current_resolution]
-                    button.handler_block(handler_id)
-                    button.set_active(True)
-                    button.handler_unblock(handler_id)
-                else:
-                    button.set_active(True)
+        # Refresh current resolution in display modes, bypassing the cache
+        self.current_resolution_valid = False
+        self.update_mode_selection()
 
         self.load_input_devices()
 
         self.show_toast("Refresh complete")
 
     def connect_key_controller(self):
-        if not hasattr(self, 'key_controller') or self.key_controller is None:
+        if self.key_controller is None:
             self.key_controller = Gtk.EventControllerKey.new()
-            self.key_controller.connect("key-pressed", self.keyboard_emulator.on_key_pressed)
+            self.key_controller.connect("key-pressed", self.on_key_pressed)
             self.key_controller.connect("key-released", self.keyboard_emulator.on_key_released)
             self.win.add_controller(self.key_controller)
             print("Key controller connected")
 
+    def on_key_pressed(self, controller, keyval, keycode, state):
+        # Both pages forward keys, but what the settings sheet or a dialog
+        # leaves over stays local
+        if self.overlay_open():
+            return False
+        return self.keyboard_emulator.on_key_pressed(controller, keyval, keycode, state)
+
+    def overlay_open(self):
+        """Whether the settings sheet or a dialog is over the pages"""
+        return self.bottom_sheet.get_open() or self.win.get_visible_dialog() is not None
+
+    def input_page_active(self):
+        """Whether the input tab is showing with no sheet or dialog over it"""
+        return self.stack.get_visible_child_name() == "input" and not self.overlay_open()
+
     def disconnect_key_controller(self):
-        if hasattr(self, 'key_controller') and self.key_controller is not None:
+        if self.key_controller is not None:
             self.win.remove_controller(self.key_controller)
             self.key_controller = None
             print("Key controller disconnected")
 
     def on_settings_action(self, action, parameter):
+        self.create_settings_content()
         self.bottom_sheet.set_open(True)
 
     def on_info_action(self, action, parameter):
@@ -392,7 +526,14 @@ class ExternalDisplays(Adw.Application):
         # Present the dialog
         dialog.present(self.win)
 
+    def on_visible_page_changed(self, stack, pspec):
+        if stack.get_visible_child_name() == "input":
+            self.create_main_content()
+
     def create_main_content(self):
+        if self.drawing_area is not None:
+            return
+
         # Drawing area for touch events
         self.drawing_area = Gtk.DrawingArea()
         self.drawing_area.set_can_focus(True)
@@ -403,11 +544,10 @@ class ExternalDisplays(Adw.Application):
         # Ensure drawing area can receive focus
         self.drawing_area.set_focusable(True)
 
-        # Add key controller to the drawing area
-        key_controller = Gtk.EventControllerKey.new()
-        key_controller.connect("key-pressed", self.keyboard_emulator.on_key_pressed)
-        key_controller.connect("key-released", self.keyboard_emulator.on_key_released)
-        self.drawing_area.add_controller(key_controller)
+        # Take focus back when another widget in the window grabs it
+        drawing_focus_controller = Gtk.EventControllerFocus.new()
+        drawing_focus_controller.connect("leave", self.on_drawing_area_focus_out)
+        self.drawing_area.add_controller(drawing_focus_controller)
 
         # Frame for the drawing area
         frame = Gtk.Frame()
@@ -417,78 +557,303 @@ class ExternalDisplays(Adw.Application):
         self.touch_mouse_emulator = TouchMouseEmulator(
             self.drawing_area, self
         )
+        if self.touch_sensitivity is not None:
+            self.touch_mouse_emulator.sensitivity = self.touch_sensitivity
 
     def get_display_modes(self):
-        modes_path = f"/sys/class/drm/{self.card_path}/{self.card_path}-{self.connector}/modes"
-        if os.path.exists(modes_path):
+        try:
+            fd = os.open(self.modes_path, os.O_RDONLY | os.O_CLOEXEC)
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            print(f"Error reading modes: {e}")
+            return []
+
+        try:
+            # sysfs attributes are at most a page, a single read gets them whole
+            data = os.read(fd, 65536)
+            # Deduplicate the list while preserving order
+            return list(dict.fromkeys(data.decode('ascii', 'ignore').split()))
+        except Exception as e:
+            print(f"Error reading modes: {e}")
+            return []
+        finally:
+            os.close(fd)
+
+    def get_x_display(self):
+        if self.x_display is None:
+            self.x_display = display.Display(self.target_display)
+            self.current_resolution_valid = False
+
+            if self.x_display.has_extension('RANDR'):
+                root = self.x_display.screen().root
+                root.xrandr_select_input(
+                    randr.RRScreenChangeNotifyMask
+                    | randr.RRCrtcChangeNotifyMask
+                    | randr.RROutputChangeNotifyMask
+                )
+                self.x_display.flush()
+                self.x_display_source_id = GLib.unix_fd_add_full(
+                    GLib.PRIORITY_DEFAULT,
+                    self.x_display.fileno(),
+                    GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+                    self.on_x_events
+                )
+        return self.x_display
+
+    def close_x_display(self):
+        if self.x_display_source_id is not None:
+            GLib.source_remove(self.x_display_source_id)
+            self.x_display_source_id = None
+
+        if self.x_display is not None:
             try:
-                with open(modes_path, 'r') as f:
-                    modes = [line.strip() for line in f.readlines()]
-                # Deduplicate the list while preserving order
-                unique_modes = []
-                for mode in modes:
-                    if mode not in unique_modes:
-                        unique_modes.append(mode)
-                return unique_modes
+                self.x_display.close()
             except Exception as e:
-                print(f"Error reading modes: {e}")
-        return []
+                print(f"Error closing X display: {e}")
+            self.x_display = None
+
+        self.current_resolution_valid = False
+        self.randr_output = None
+
+    def drain_x_events(self):
+        # Only RandR notifications are selected, any of them means the
+        # output configuration may have changed
+        changed = False
+        while self.x_display.pending_events():
+            self.x_display.next_event()
+            changed = True
+
+        if changed:
+            self.current_resolution_valid = False
+        return changed
+
+    def on_x_events(self, fd, condition):
+        if condition & (GLib.IOCondition.HUP | GLib.IOCondition.ERR):
+            # Returning SOURCE_REMOVE drops the watch, don't remove it twice
+            self.x_display_source_id = None
+            self.close_x_display()
+            return GLib.SOURCE_REMOVE
 
-    def get_current_resolution(self):
         try:
-            d = display.Display()
-            screen = d.screen()
-            root = screen.root
+            changed = self.drain_x_events()
+        except Exception as e:
+            print(f"Error reading X events: {e}")
+            self.x_display_source_id = None
+            self.close_x_display()
+            return GLib.SOURCE_REMOVE
 
-            if not hasattr(d, 'randr_version'):
-                width = screen.width_in_pixels
-                height = screen.height_in_pixels
-                return f"{width}x{height}"
+        if changed:
+            self.update_mode_selection()
+        return GLib.SOURCE_CONTINUE
 
-            resources = root.xrandr_get_screen_resources()
+    def reload_display_modes(self):
+        modes = tuple(self.get_display_modes())
 
-            for output in resources.outputs:
-                output_info = d.xrandr_get_output_info(output, resources.config_timestamp)
+        # The model only needs replacing when sysfs reports different modes
+        if modes != self.display_modes:
+            self.display_modes = modes
 
-                if output_info.connection != 0:  # 0 is Connected
-                    continue
+            self.mode_selection_updating = True
+            try:
+                self.modes_model.splice(0, self.modes_model.get_n_items(), modes)
+                # Don't show the first mode as selected until the current one is known
+                self.modes_combo.set_selected(Gtk.INVALID_LIST_POSITION)
+            finally:
+                self.mode_selection_updating = False
+
+            if modes:
+                self.modes_combo.set_subtitle("Select a display mode")
+            else:
+                self.modes_combo.set_subtitle("No display modes available")
 
-                output_name = output_info.name
-                if self.connector in output_name:
-                    if output_info.crtc:
-                        crtc_info = d.xrandr_get_crtc_info(output_info.crtc, resources.config_timestamp)
-                        width = crtc_info.width
-                        height = crtc_info.height
-                        return f"{width}x{height}"
-            return None
+        self.update_mode_selection()
+
+    def update_mode_selection(self):
+        # Without modes there's nothing to select, don't query X for nothing
+        if self.modes_combo is None or not self.display_modes:
+            return
+
+        current_resolution = self.get_current_resolution()
+        if current_resolution and current_resolution in self.display_modes:
+            # Only update if the combo isn't already set to the current resolution
+            position = self.display_modes.index(current_resolution)
+            if self.modes_combo.get_selected() != position:
+                self.mode_selection_updating = True
+                try:
+                    self.modes_combo.set_selected(position)
+                finally:
+                    self.mode_selection_updating = False
+
+    def get_current_resolution(self):
+        try:
+            d = self.get_x_display()
+
+            # Events may already be queued by an earlier reply read
+            if self.x_display_source_id is not None:
+                self.drain_x_events()
+                if self.current_resolution_valid:
+                    return self.current_resolution
+
+            self.current_resolution = self.query_current_resolution(d)
+            self.current_resolution_valid = self.x_display_source_id is not None
+            return self.current_resolution
         except Exception as e:
             print(f"Error getting current resolution with Xlib: {e}")
+            # The connection may be dead, reconnect on the next call
+            self.close_x_display()
             return None
 
+    def query_current_resolution(self, d):
+        screen = d.screen()
+        root = screen.root
+
+        # has_extension answers from the connection setup, no round trip
+        if not d.has_extension('RANDR'):
+            width = screen.width_in_pixels
+            height = screen.height_in_pixels
+            return f"{width}x{height}"
+
+        # The current variant returns the server's state without reprobing outputs
+        resources = root.xrandr_get_screen_resources_current()
+
+        # Try the output found last time before scanning all of them
+        outputs = resources.outputs
+        if self.randr_output in outputs:
+            outputs = [self.randr_output] + [output for output in outputs if output != self.randr_output]
+
+        for output in outputs:
+            output_info = d.xrandr_get_output_info(output, resources.config_timestamp)
+
+            if output_info.connection != 0:  # 0 is Connected
+                continue
+
+            if self.is_connector_output(output_info.name):
+                self.randr_output = output
+                if output_info.crtc:
+                    crtc_info = d.xrandr_get_crtc_info(output_info.crtc, resources.config_timestamp)
+                    width = crtc_info.width
+                    height = crtc_info.height
+                    return f"{width}x{height}"
+        return None
+
+    def is_connector_output(self, output_name):
+        """Whether a RandR output is our connector, X may name it differently from sysfs"""
+        return self.connector in output_name
+
+    def set_display_mode_randr(self, mode):
+        """Switch the connector to mode over RandR, returns False when xrandr is needed"""
+        # Runs on a worker thread, so use a private connection rather than self.x_display
+        d = display.Display(self.target_display)
+        try:
+            if not d.has_extension('RANDR'):
+                return False
+
+            screen = d.screen()
+            root = screen.root
+            resources = root.xrandr_get_screen_resources_current()
+            timestamp = resources.config_timestamp
+
+            # Mode names are packed back to back in mode list order
+            mode_names = {}
+            mode_sizes = {}
+            offset = 0
+            for mode_info in resources.modes:
+                mode_names[mode_info.id] = resources.mode_names[offset:offset + mode_info.name_length]
+                mode_sizes[mode_info.id] = (mode_info.width, mode_info.height)
+                offset += mode_info.name_length
+
+            for output in resources.outputs:
+                output_info = d.xrandr_get_output_info(output, timestamp)
+                if not self.is_connector_output(output_info.name):
+                    continue
+
+                mode_id = next((m for m in output_info.modes if mode_names.get(m) == mode), None)
+                # Enabling an output needs a CRTC picked for it, leave that to xrandr
+                if mode_id is None or not output_info.crtc:
+                    return False
+
+                # The screen has to cover every active CRTC once this one changes
+                width = height = 0
+                for crtc in resources.crtcs:
+                    crtc_info = d.xrandr_get_crtc_info(crtc, timestamp)
+                    if crtc == output_info.crtc:
+                        target = crtc_info
+                        crtc_width, crtc_height = mode_sizes[mode_id]
+                        if crtc_info.rotation & (randr.Rotate_90 | randr.Rotate_270):
+                            crtc_width, crtc_height = crtc_height, crtc_width
+                    elif crtc_info.mode:
+                        crtc_width, crtc_height = crtc_info.width, crtc_info.height
+                    else:
+                        continue
+                    width = max(width, crtc_info.x + crtc_width)
+                    height = max(height, crtc_info.y + crtc_height)
+
+                current_size = (screen.width_in_pixels, screen.height_in_pixels)
+                grown_size = (max(current_size[0], width), max(current_size[1], height))
+
+                # Grow the screen before the CRTC needs the room, shrink it after
+                if grown_size != current_size:
+                    self.resize_x_screen(root, screen, *grown_size)
+
+                reply = d.xrandr_set_crtc_config(
+                    output_info.crtc, timestamp, target.x, target.y,
+                    mode_id, target.rotation, target.outputs
+                )
+                if reply.status != randr.SetConfigSuccess:
+                    return False
+
+                if (width, height) != grown_size:
+                    self.resize_x_screen(root, screen, width, height)
+
+                d.sync()
+                return True
+            return False
+        finally:
+            d.close()
+
+    def resize_x_screen(self, root, screen, width, height):
+        # Keep the physical size in proportion so the DPI doesn't change
+        root.xrandr_set_screen_size(
+            width, height,
+            width * screen.width_in_mms // screen.width_in_pixels,
+            height * screen.height_in_mms // screen.height_in_pixels
+        )
+
     def apply_display_mode(self, mode):
+        # xrandr can take a while to switch modes, keep it off the main loop
+        self.show_progress_dialog(f"Changing display mode to {mode}...")
+        thread = threading.Thread(target=self.run_display_mode_change, args=(mode,))
+        thread.daemon = True
+        thread.start()
+
+    def run_display_mode_change(self, mode):
         try:
-            cmd = ["xrandr", "--output", self.connector, "--mode", mode]
-            subprocess.run(cmd, check=True)
-            self.show_toast(f"Display mode changed to {mode}")
-            return True
+            try:
+                changed = self.set_display_mode_randr(mode)
+            except Exception as e:
+                print(f"Error changing display mode with Xlib: {e}")
+                changed = False
+
+            if not changed:
+                cmd = ["xrandr", "--output", self.connector, "--mode", mode]
+                subprocess.run(cmd, check=True)
+            GLib.idle_add(self.show_toast, f"Display mode changed to {mode}")
         except Exception as e:
-            self.show_toast(f"Failed to change mode: {e}")
-            return False
+            GLib.idle_add(self.show_toast, f"Failed to change mode: {e}")
 
-    def on_mode_selected(self, button, mode):
-        if button.get_active():
-            self.apply_display_mode(mode)
+        GLib.idle_add(self.ensure_close_progress_dialog, priority=GLib.PRIORITY_HIGH)
+        return False
 
-    def create_config_page(self):
-        # Add key controller to the config page as well
-        key_controller = Gtk.EventControllerKey.new()
-        key_controller.connect("key-pressed", self.keyboard_emulator.on_key_pressed)
-        key_controller.connect("key-released", self.keyboard_emulator.on_key_released)
-        self.config_page.add_controller(key_controller)
+    def on_mode_selected(self, combo, pspec):
+        if self.mode_selection_updating:
+            return
 
-        # Store the controller reference
-        self.config_page_key_controller = key_controller
+        position = combo.get_selected()
+        if position < len(self.display_modes):
+            self.apply_display_mode(self.display_modes[position])
 
+    def create_config_page(self, services_enabled):
         display_info = get_display_info(self.card_path, self.connector)
 
         # Scrolled window to make content scrollable
@@ -511,12 +876,8 @@ class ExternalDisplays(Adw.Application):
         self.display_services_switch = Gtk.Switch()
         self.display_services_switch.set_valign(Gtk.Align.CENTER)
 
-        # Check initial state of services
-        displaylink_active = check_service_status("displaylink-driver.service", system_bus=True)
-        display_server_active = check_service_status("external-display-display-server.service", system_bus=True)
-
         # Set initial state of switch
-        self.display_services_switch.set_active(displaylink_active and display_server_active)
+        self.display_services_switch.set_active(services_enabled)
 
         # Connect signal
         self.display_services_switch.connect("state-set", self.on_display_services_toggled)
@@ -537,7 +898,7 @@ class ExternalDisplays(Adw.Application):
         status_row.set_title("Status")
         status_row.set_subtitle("Current connection status")
         status_row.set_activatable(False)
-        self.status_value = Gtk.Label(label=display_info['status'])
+        self.status_value = Gtk.Label(label=display_info.status)
         self.status_value.set_valign(Gtk.Align.CENTER)
         self.status_value.set_ellipsize(True)
         self.status_value.set_selectable(True)
@@ -549,7 +910,7 @@ class ExternalDisplays(Adw.Application):
         power_row.set_title("Power State")
         power_row.set_subtitle("Current power mode")
         power_row.set_activatable(False)
-        self.power_value = Gtk.Label(label=display_info['power_state'])
+        self.power_value = Gtk.Label(label=display_info.power_state)
         self.power_value.set_valign(Gtk.Align.CENTER)
         self.power_value.set_ellipsize(True)
         self.power_value.set_selectable(True)
@@ -561,7 +922,7 @@ class ExternalDisplays(Adw.Application):
         mfg_row.set_title("Manufacturer")
         mfg_row.set_subtitle("Display manufacturer")
         mfg_row.set_activatable(False)
-        self.mfg_value = Gtk.Label(label=display_info['manufacturer'])
+        self.mfg_value = Gtk.Label(label=display_info.manufacturer)
         self.mfg_value.set_valign(Gtk.Align.CENTER)
         self.mfg_value.set_ellipsize(True)
         self.mfg_value.set_selectable(True)
@@ -575,56 +936,24 @@ class ExternalDisplays(Adw.Application):
             'power_state': self.power_value,
             'manufacturer': self.mfg_value
         }
+        self.last_display_info = display_info
 
-        # Display modes section with Adwaita expander
+        # Display modes section with a single combo row
         modes_group = Adw.PreferencesGroup()
         modes_group.set_title("Display Modes")
 
-        # Expander row
-        self.modes_expander = Adw.ExpanderRow()
-        self.modes_expander.set_title("Available Resolutions")
-        self.modes_expander.set_subtitle("Click to select a display mode")
-
-        # Get display modes
-        modes = self.get_display_modes()
-
-        # Radio button group
-        radio_group = None
-
-        # No modes available message
-        if not modes:
-            no_modes_row = Adw.ActionRow()
-            no_modes_row.set_title("No display modes available")
-            self.modes_expander.add_row(no_modes_row)
-        else:
-            # Get current resolution
-            current_resolution = self.get_current_resolution()
-
-        self.mode_radio_buttons.clear()
-        self.mode_radio_handlers.clear()
+        self.modes_model = Gtk.StringList.new([])
+        self.modes_combo = Adw.ComboRow()
+        self.modes_combo.set_title("Resolution")
+        self.modes_combo.set_model(self.modes_model)
 
-        for mode in modes:
-            mode_row = Adw.ActionRow()
-            mode_row.set_title(mode)
+        # Fill the combo with the available modes
+        self.display_modes = None
+        self.reload_display_modes()
 
-            radio_button = Gtk.CheckButton()
-            if radio_group is None:
-                radio_group = radio_button
-            else:
-                radio_button.set_group(radio_group)
-
-            self.mode_radio_buttons[mode] = radio_button
-
-            if current_resolution and mode == current_resolution:
-                radio_button.set_active(True)
+        self.modes_combo.connect("notify::selected", self.on_mode_selected)
 
-            handler_id = radio_button.connect("toggled", self.on_mode_selected, mode)
-            self.mode_radio_handlers[mode] = handler_id
-
-            mode_row.add_prefix(radio_button)
-            self.modes_expander.add_row(mode_row)
-
-        modes_group.add(self.modes_expander)
+        modes_group.add(self.modes_combo)
 
         preferences_page.add(modes_group)
 
@@ -637,7 +966,10 @@ class ExternalDisplays(Adw.Application):
         self.inputs_expander.set_title("Input Devices")
         self.inputs_expander.set_subtitle("Select devices to redirect")
 
-        # Load the input devices
+        # Load the input devices into the fresh expander
+        self.input_device_entries = {}
+        self.active_input_devices = set()
+        self.input_placeholder_row = None
         self.load_input_devices()
 
         inputs_group.add(self.inputs_expander)
@@ -649,6 +981,7 @@ class ExternalDisplays(Adw.Application):
 
     def on_display_services_toggled(self, switch, state):
         if state:
+            self.set_input_redirector_display()
             self.show_progress_dialog("Starting display services...")
             thread = threading.Thread(target=self.start_display_services)
             thread.daemon = True
@@ -661,27 +994,37 @@ class ExternalDisplays(Adw.Application):
         return False
 
     def update_display_ui_state(self, enabled):
-        if not hasattr(self, 'display_info_labels') or not hasattr(self, 'modes_expander'):
+        if not self.display_info_labels or self.modes_combo is None:
             return
 
+        self.display_services_enabled = enabled
+
         if enabled:
-            if not hasattr(self, 'refresh_timeout_id') or self.refresh_timeout_id is None:
-                self.refresh_timeout_id = GLib.timeout_add_seconds(5, self.refresh_display_info)
+            self.start_refresh_timer()
 
-            self.modes_expander.set_sensitive(True)
+            self.modes_combo.set_sensitive(True)
             self.inputs_expander.set_sensitive(True)
 
             self.refresh_display_info()
         else:
             for key, label in self.display_info_labels.items():
                 label.set_text("")
+            self.last_display_info = None
 
-            self.modes_expander.set_sensitive(False)
+            self.modes_combo.set_sensitive(False)
             self.inputs_expander.set_sensitive(False)
 
-            if hasattr(self, 'refresh_timeout_id') and self.refresh_timeout_id is not None:
-                GLib.source_remove(self.refresh_timeout_id)
-                self.refresh_timeout_id = None
+            self.stop_refresh_timer()
+
+    def start_refresh_timer(self):
+        # Polling is only needed when hotplug uevents aren't available
+        if self.uevent_socket is None and self.refresh_timeout_id is None:
+            self.refresh_timeout_id = GLib.timeout_add_seconds(5, self.refresh_display_info)
+
+    def stop_refresh_timer(self):
+        if self.refresh_timeout_id is not None:
+            GLib.source_remove(self.refresh_timeout_id)
+            self.refresh_timeout_id = None
 
     def show_progress_dialog(self, message):
         self.progress_dialog = Adw.Dialog.new()
@@ -706,146 +1049,175 @@ class ExternalDisplays(Adw.Application):
         self.progress_dialog.present(self.win)
 
     def ensure_close_progress_dialog(self):
-        if hasattr(self, 'progress_dialog') and self.progress_dialog:
+        if self.progress_dialog is not None:
             self.progress_dialog.close()
             self.progress_dialog = None
         return False
 
-    def set_input_redirector_display(self):
-        schema = 'io.furios.input-redirector'
-        key = 'display'
+    def load_input_settings(self):
         try:
-            source = Gio.SettingsSchemaSource.get_default()
-            if not source or not source.lookup(schema, False):
-                return
-            settings = Gio.Settings.new(schema)
-            settings.set_string(key, self.target_display)
+            return get_settings('io.furios.input-redirector')
         except Exception as e:
-            print(f"Failed to set input redirector display: {e}")
+            print(f"Failed to load input redirector settings: {e}")
+            return None
 
-    def start_display_services(self):
+    def set_input_redirector_display(self):
+        if self.input_settings is None:
+            return
         try:
-            success = True
+            self.input_settings.set_string('display', self.target_display)
+        except Exception as e:
+            print(f"Failed to set input redirector display: {e}")
 
-            self.set_input_redirector_display()
+    def clear_input_paths(self):
+        # Runs on the main loop so the shared settings object is never touched from a worker
+        if self.input_paths_commit_source_id is not None:
+            GLib.source_remove(self.input_paths_commit_source_id)
+            self.input_paths_commit_source_id = None
 
+        if self.input_settings is not None:
             try:
-                open(self.enable_file_path, 'a').close()
+                self.input_settings.set_string('input-paths', '')
+                print("Cleared input-redirector input-paths")
             except Exception as e:
-                print(f"Error creating enable file: {e}")
-                GLib.idle_add(self.show_toast, "Failed to enable display services")
-                success = False
+                print(f"Error clearing input paths: {e}")
+        return False
+
+    def set_enable_marker(self, enabled):
+        # Only touch the disk when the marker actually has to change
+        if enabled == self.enable_marker_state:
+            return True
+
+        try:
+            if enabled:
+                # Same as touching it, minus the buffered file object
+                os.close(os.open(self.enable_file_path, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o666))
+            else:
+                os.remove(self.enable_file_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error {'creating' if enabled else 'removing'} enable file: {e}")
+            return False
+
+        self.enable_marker_state = enabled
+        return True
+
+    def start_display_services(self):
+        # Failures are collected here and reported together once the worker is done
+        errors = []
+        try:
+            if not self.set_enable_marker(True):
+                errors.append("Failed to enable display services")
 
             if not start_service("displaylink-driver.service", system_bus=True):
-                GLib.idle_add(self.show_toast, "Failed to start displaylink driver")
-                success = False
+                errors.append("Failed to start displaylink driver")
 
-            if success:
+            if not errors:
                 if not wait_for_file("/sys/class/drm/card0"):
-                    GLib.idle_add(self.show_toast, "Timeout waiting for display")
-                    success = False
+                    errors.append("Timeout waiting for display")
 
-            if success:
+            if not errors:
                 if not wait_for_display_connected(self.card_path, self.connector):
-                    GLib.idle_add(self.show_toast, "Timeout waiting for display connection")
-                    success = False
+                    errors.append("Timeout waiting for display connection")
 
-            if success:
+            if not errors:
                 if not start_service("external-display-display-server.service", system_bus=True):
-                    GLib.idle_add(self.show_toast, "Failed to start display server")
-                    success = False
+                    errors.append("Failed to start display server")
 
-            if success:
-                if not start_service("externaldisplay.service"):
-                    GLib.idle_add(self.show_toast, "Failed to start external display service")
-                    success = False
+            # These two don't depend on each other, start them concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                externaldisplay_future = None
+                if not errors:
+                    externaldisplay_future = executor.submit(start_service, "externaldisplay.service")
+                input_redirector_future = executor.submit(start_service, "input-redirector.service")
 
-            if not start_service("input-redirector.service"):
-                GLib.idle_add(self.show_toast, "Failed to start input redirector")
-                success = False
+                if externaldisplay_future is not None and not externaldisplay_future.result():
+                    errors.append("Failed to start external display service")
 
-            if success:
-                GLib.idle_add(self.show_toast, "Display services enabled successfully")
-                GLib.idle_add(self.update_display_ui_state, True)
-            else:
-                if os.path.exists(self.enable_file_path):
-                    try:
-                        os.remove(self.enable_file_path)
-                    except Exception as e:
-                        print(f"Error removing enable file after failure: {e}")
+                if not input_redirector_future.result():
+                    errors.append("Failed to start input redirector")
 
-                GLib.idle_add(lambda: self.display_services_switch.set_active(False))
-
-            GLib.idle_add(self.ensure_close_progress_dialog, priority=GLib.PRIORITY_HIGH)
+            if errors:
+                self.set_enable_marker(False)
+                GLib.idle_add(self.finish_display_services_toggle, errors[0], False,
+                              priority=GLib.PRIORITY_HIGH)
+            else:
+                GLib.idle_add(self.finish_display_services_toggle, "Display services enabled successfully", True,
+                              priority=GLib.PRIORITY_HIGH)
         except Exception as e:
             print(f"Unexpected error in start_display_services: {e}")
-            GLib.idle_add(self.show_toast, f"Error enabling display services: {e}")
-            GLib.idle_add(lambda: self.display_services_switch.set_active(False))
-            GLib.idle_add(self.close_progress_dialog)
+            GLib.idle_add(self.finish_display_services_toggle, f"Error enabling display services: {e}", False,
+                          priority=GLib.PRIORITY_HIGH)
 
         return False
 
     def stop_display_services(self):
         try:
-            if os.path.exists(self.enable_file_path):
-                try:
-                    os.remove(self.enable_file_path)
-                except Exception as e:
-                    print(f"Error removing enable file: {e}")
-                    GLib.idle_add(self.show_toast, f"Failed to disable display services")
+            marker_removed = self.set_enable_marker(False)
 
-            stop_service("externaldisplay.service")
-            stop_service("input-redirector.service")
-            stop_service("external-display-display-server.service", system_bus=True)
+            # StopUnit only queues a job, so the three requests can go out together
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                executor.submit(stop_service, "externaldisplay.service")
+                executor.submit(stop_service, "input-redirector.service")
+                executor.submit(stop_service, "external-display-display-server.service", system_bus=True)
 
-            try:
-                settings = Gio.Settings.new('io.furios.input-redirector')
-                settings.set_string('input-paths', '')
-                print("Cleared input-redirector input-paths")
-            except Exception as e:
-                print(f"Error clearing input paths: {e}")
+            GLib.idle_add(self.clear_input_paths)
 
-            GLib.idle_add(self.show_toast, "Display services stopped successfully")
-            GLib.idle_add(self.update_display_ui_state, False)
-            GLib.idle_add(self.ensure_close_progress_dialog, priority=GLib.PRIORITY_HIGH)
+            if marker_removed:
+                message = "Display services stopped successfully"
+            else:
+                message = "Failed to disable display services"
+            GLib.idle_add(self.finish_display_services_toggle, message, False,
+                          priority=GLib.PRIORITY_HIGH)
         except Exception as e:
             print(f"Unexpected error in stop_display_services: {e}")
-            GLib.idle_add(self.show_toast, f"Error stopping display services: {e}")
-            GLib.idle_add(self.ensure_close_progress_dialog, priority=GLib.PRIORITY_HIGH)
+            GLib.idle_add(self.finish_display_services_toggle, f"Error stopping display services: {e}", None,
+                          priority=GLib.PRIORITY_HIGH)
 
         return False
 
+    def finish_display_services_toggle(self, message, enabled):
+        """Apply the outcome of a service start or stop in one main loop dispatch"""
+        self.ensure_close_progress_dialog()
+        self.show_toast(message)
+
+        if enabled is not None:
+            self.update_display_ui_state(enabled)
+            # A failed start flips the switch back, which stops whatever did come up
+            if self.display_services_switch.get_active() != enabled:
+                self.display_services_switch.set_active(enabled)
+        return False
+
     def refresh_display_info(self):
-        if not hasattr(self, 'display_info_labels'):
-            return True
+        if not self.display_info_labels:
+            return GLib.SOURCE_CONTINUE
 
         display_info = get_display_info(self.card_path, self.connector)
+        self.set_display_info_labels(display_info)
 
-        for key, value in display_info.items():
-            if key in self.display_info_labels:
-                self.display_info_labels[key].set_text(value)
+        # Modes can change on hotplug, this only resyncs the selection otherwise
+        self.reload_display_modes()
 
-        current_resolution = self.get_current_resolution()
-        if current_resolution and current_resolution in self.mode_radio_buttons:
-            # Only update if the current active button isn't already set to the current resolution
-            button = self.mode_radio_buttons[current_resolution]
-            if not button.get_active():
-                # Temporarily block signal handlers
-                if current_resolution in self.mode_radio_handlers:
-                    handler_id = self.mode_radio_handlers[current_resolution]
-                    button.handler_block(handler_id)
-                    button.set_active(True)
-                    button.handler_unblock(handler_id)
-                else:
-                    # If we don't have the handler ID for some reason, just set it active
-                    button.set_active(True)
-
-        if display_info.get('status') == 'connected':
-            if self.refresh_timeout_id:
-                GLib.source_remove(self.refresh_timeout_id)
-        return True
+        # The fallback poll is only waiting for the display to come up
+        if display_info.status == 'connected':
+            self.stop_refresh_timer()
+            return GLib.SOURCE_REMOVE
+        return GLib.SOURCE_CONTINUE
+
+    def set_display_info_labels(self, display_info):
+        # Setting label text queues a relayout even if the text is the same
+        if display_info == self.last_display_info:
+            return
+
+        self.last_display_info = display_info
+        for key, label in self.display_info_labels.items():
+            label.set_text(getattr(display_info, key))
 
     def create_settings_content(self):
+        if self.sensitivity_slider is not None:
+            return False
+
         self.bottom_sheet.set_can_open(True)
         self.bottom_sheet.set_modal(True)
 
@@ -858,43 +1230,43 @@ class ExternalDisplays(Adw.Application):
         # Sensitivity adjustment
         sensitivity_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
         sensitivity_label = Gtk.Label(label="Motion Sensitivity", halign=Gtk.Align.START)
-        sensitivity_slider = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL)
-        sensitivity_slider.set_range(0.5, 3.0)
-        sensitivity_slider.set_draw_value(True)
-        sensitivity_slider.set_value(2.0)
-        sensitivity_slider.set_hexpand(True)
+        self.sensitivity_slider = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL)
+        self.sensitivity_slider.set_range(0.5, 3.0)
+        self.sensitivity_slider.set_draw_value(True)
+        self.sensitivity_slider.set_value(2.0)
+        self.sensitivity_slider.set_hexpand(True)
         sensitivity_box.append(sensitivity_label)
-        sensitivity_box.append(sensitivity_slider)
+        sensitivity_box.append(self.sensitivity_slider)
         content.append(sensitivity_box)
 
         # Display selector
         display_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
         display_label = Gtk.Label(label="Target Display")
-        display_input = Gtk.Entry()
-        display_input.set_text(self.target_display)
-        display_input.set_hexpand(True)
+        self.display_input = Gtk.Entry()
+        self.display_input.set_text(self.target_display)
+        self.display_input.set_hexpand(True)
         display_box.append(display_label)
-        display_box.append(display_input)
+        display_box.append(self.display_input)
         content.append(display_box)
 
         # Connector settings
         connector_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
         connector_label = Gtk.Label(label="Connector")
-        connector_input = Gtk.Entry()
-        connector_input.set_text(self.connector)
-        connector_input.set_hexpand(True)
+        self.connector_input = Gtk.Entry()
+        self.connector_input.set_text(self.connector)
+        self.connector_input.set_hexpand(True)
         connector_box.append(connector_label)
-        connector_box.append(connector_input)
+        connector_box.append(self.connector_input)
         content.append(connector_box)
 
         # Card path settings
         card_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
         card_label = Gtk.Label(label="Card Path")
-        card_input = Gtk.Entry()
-        card_input.set_text(self.card_path)
-        card_input.set_hexpand(True)
+        self.card_input = Gtk.Entry()
+        self.card_input.set_text(self.card_path)
+        self.card_input.set_hexpand(True)
         card_box.append(card_label)
-        card_box.append(card_input)
+        card_box.append(self.card_input)
         content.append(card_box)
 
         # Apply button
@@ -903,49 +1275,61 @@ class ExternalDisplays(Adw.Application):
         content.append(apply_button)
 
         self.bottom_sheet.set_sheet(content)
+        return False
+
+    def on_input_device_toggled(self, button, key):
+        if button.get_active():
+            self.active_input_devices.add(key)
+        else:
+            self.active_input_devices.discard(key)
+
+        if self.input_settings is None:
+            return
 
-    def on_input_device_toggled(self, button):
-        paths = [real for btn, real in self.input_device_buttons if btn.get_active()]
+        # Coalesce quick successive toggles into a single gsettings write
+        if self.input_paths_commit_source_id is not None:
+            GLib.source_remove(self.input_paths_commit_source_id)
+        self.input_paths_commit_source_id = GLib.timeout_add(100, self.commit_input_paths)
+
+    def commit_input_paths(self):
+        self.input_paths_commit_source_id = None
+
+        # Same order as the rows, a path listed under several ids is written once
+        paths = dict.fromkeys(real_path for device, real_path in sorted(self.active_input_devices))
         val = ','.join(paths)
-        settings = Gio.Settings.new('io.furios.input-redirector')
-        settings.set_string('input-paths', val)
+        self.input_settings.set_string('input-paths', val)
+        # Don't wait for the changed signal, a resync may run before it's delivered
+        self.selected_input_paths = frozenset(paths)
+        return GLib.SOURCE_REMOVE
 
     def on_apply_settings(self, button):
-        sheet = self.bottom_sheet.get_sheet()
-        sensitivity_updated = False
-        display_updated = False
-        connector_updated = False
-        card_updated = False
-
-        for child in sheet:
-            if isinstance(child, Gtk.Box):
-                for box_child in child:
-                    if isinstance(box_child, Gtk.Scale) and not sensitivity_updated:
-                        sensitivity = box_child.get_value()
-                        self.touch_mouse_emulator.sensitivity = sensitivity
-                        sensitivity_updated = True
-                    elif isinstance(box_child, Gtk.Entry):
-                        entry_text = box_child.get_text()
-                        if not display_updated and child.get_first_child().get_text() == "Target Display":
-                            if entry_text != self.target_display:
-                                self.target_display = entry_text
-                                os.environ['DISPLAY'] = self.target_display
-                                self.set_input_redirector_display()
-                                self.touch_mouse_emulator.update_target_dimensions()
-                                display_updated = True
-                        elif not connector_updated and child.get_first_child().get_text() == "Connector":
-                            if entry_text != self.connector:
-                                self.connector = entry_text
-                                connector_updated = True
-                        elif not card_updated and child.get_first_child().get_text() == "Card Path":
-                            if entry_text != self.card_path:
-                                self.card_path = entry_text
-                                card_updated = True
+        self.touch_sensitivity = self.sensitivity_slider.get_value()
+        if self.touch_mouse_emulator is not None:
+            self.touch_mouse_emulator.sensitivity = self.touch_sensitivity
+
+        display = self.display_input.get_text()
+        if display != self.target_display:
+            self.target_display = display
+            os.environ['DISPLAY'] = self.target_display
+            self.close_x_display()
+            self.set_input_redirector_display()
+            if self.touch_mouse_emulator is not None:
+                self.touch_mouse_emulator.update_target_dimensions()
+
+        connector = self.connector_input.get_text()
+        connector_updated = connector != self.connector
+        if connector_updated:
+            self.connector = connector
+
+        card_path = self.card_input.get_text()
+        card_updated = card_path != self.card_path
+        if card_updated:
+            self.card_path = card_path
 
         if connector_updated or card_updated:
-            for child in self.config_page.get_children():
-                self.config_page.remove(child)
-            self.create_config_page()
+            self.update_connector_paths()
+            self.current_resolution_valid = False
+            # The page widgets stay, only the labels and mode rows follow the new connector
             self.refresh_display_info()
 
         self.bottom_sheet.set_open(False)
@@ -954,36 +1338,58 @@ class ExternalDisplays(Adw.Application):
         return self.touch_mouse_emulator.on_draw(area, cr, width, height)
 
     def show_toast(self, message):
-        toast = Adw.Toast.new(message)
-        self.toast_overlay.add_toast(toast)
+        # A burst of messages replaces the visible toast instead of queueing up
+        if self.toast_shown:
+            if self.toast.get_title() == message:
+                return
+            # Retitling a shown toast keeps its old timeout, so the new message
+            # could vanish right away, replace it with a fresh toast instead
+            self.toast.dismiss()
+
+        self.toast = Adw.Toast.new(message)
+        self.toast.connect("dismissed", self.on_toast_dismissed)
+        self.toast_shown = True
+        self.toast_overlay.add_toast(self.toast)
+
+    def on_toast_dismissed(self, toast):
+        # A replaced toast is dismissed after its successor is already shown
+        if toast is self.toast:
+            self.toast_shown = False
 
     def on_focus_in(self, controller):
         print("Window received focus")
+        self.focus_regain_active = True
         self.start_focus_regain()
 
+        # Catch up on anything missed while the fallback poll was paused
+        if self.display_services_enabled and self.uevent_socket is None:
+            self.start_refresh_timer()
+            self.refresh_display_info()
+
     def on_focus_out(self, controller):
         print("Window lost focus")
+        self.focus_regain_active = False
         self.stop_focus_regain()
+        self.stop_refresh_timer()
+
+    def on_drawing_area_focus_out(self, controller):
+        if self.focus_regain_active:
+            self.start_focus_regain()
 
     def start_focus_regain(self):
-        if not self.focus_regain_active:
-            self.focus_regain_active = True
-            self.focus_regain_source_id = GLib.timeout_add(1000, self.regain_focus)
-            print("Focus regain started")
+        # One-shot, focus changes come in bursts so let them settle first
+        if self.focus_regain_source_id is None:
+            self.focus_regain_source_id = GLib.timeout_add(250, self.regain_focus)
 
     def stop_focus_regain(self):
-        if self.focus_regain_active and self.focus_regain_source_id is not None:
+        if self.focus_regain_source_id is not None:
             GLib.source_remove(self.focus_regain_source_id)
             self.focus_regain_source_id = None
-            self.focus_regain_active = False
-            print("Focus regain stopped")
 
     def regain_focus(self):
-        if self.focus_regain_active:
-            self.win.present()
+        self.focus_regain_source_id = None
 
-            # If we're on the input tab, ensure drawing area has focus
-            if self.stack.get_visible_child_name() == "input":
-                self.drawing_area.grab_focus()
-            return GLib.SOURCE_CONTINUE
+        # Only on the input tab, and never steal focus from the sheet or dialogs
+        if self.focus_regain_active and self.input_page_active():
+            self.drawing_area.grab_focus()
         return GLib.SOURCE_REMOVE
@@ -6,7 +6,25 @@
 
 import gi
 from gi.repository import Gdk
-import subprocess
+
+# Plain ints, so testing the event state doesn't wrap it in a flags object
+CONTROL_MASK = int(Gdk.ModifierType.CONTROL_MASK)
+ALT_MASK = int(Gdk.ModifierType.ALT_MASK)
+
+# Keys sent by name as they are
+SPECIAL_KEYS = frozenset([
+    'Return', 'BackSpace', 'Tab', 'space', 'Up', 'Down', 'Left', 'Right',
+    'Home', 'End', 'Page_Up', 'Page_Down', 'Delete', 'Insert',
+    *(f'F{i}' for i in range(1, 36))
+])
+
+# Map the modifier keys to their base name
+MODIFIER_MAP = {
+    'Control_L': 'ctrl', 'Control_R': 'ctrl',
+    'Alt_L': 'alt', 'Alt_R': 'alt',
+    'Shift_L': 'shift', 'Shift_R': 'shift',
+    'Super_L': 'super', 'Super_R': 'super'
+}
 
 class KeyboardEmulator:
     def __init__(self, app):
@@ -20,49 +38,41 @@ class KeyboardEmulator:
         }
 
     def on_key_pressed(self, controller, keyval, keycode, state):
-        """Handle key presses and forward them to xdotool"""
+        """Handle key presses and forward them to the target display"""
         try:
             # Get the key name or character
             keyname = Gdk.keyval_name(keyval)
 
-            if keyname in ['Return', 'BackSpace', 'Tab', 'space', 'Up', 'Down', 'Left', 'Right',
-                           'Home', 'End', 'Page_Up', 'Page_Down', 'Delete', 'Insert']:
-                self.execute_command(f"xdotool key {keyname}")
-            elif keyname in ['Control_L', 'Control_R', 'Alt_L', 'Alt_R', 'Shift_L', 'Shift_R', 'Super_L', 'Super_R']:
-                # Map the modifier keys to their base name
-                modifier_map = {
-                    'Control_L': 'ctrl', 'Control_R': 'ctrl',
-                    'Alt_L': 'alt', 'Alt_R': 'alt',
-                    'Shift_L': 'shift', 'Shift_R': 'shift',
-                    'Super_L': 'super', 'Super_R': 'super'
-                }
+            # Named keys, including the function keys
+            if keyname in SPECIAL_KEYS:
+                self.app.xdo.key(keyname)
+            elif keyname in MODIFIER_MAP:
+                modifier = MODIFIER_MAP[keyname]
 
                 # Send keydown if not already pressed
-                if not self.active_modifiers[modifier_map[keyname]]:
-                    self.active_modifiers[modifier_map[keyname]] = True
-                    self.execute_command(f"xdotool keydown {modifier_map[keyname]}")
-            # Handle function keys
-            elif keyname.startswith('F') and keyname[1:].isdigit():
-                self.execute_command(f"xdotool key {keyname}")
+                if not self.active_modifiers[modifier]:
+                    self.active_modifiers[modifier] = True
+                    self.app.xdo.key_down(modifier)
             # Handle regular characters by typing them
             else:
                 # Convert keyval to character
                 char = chr(keyval)
                 if char.isprintable():
                     # Special handling for ctrl/alt combinations
-                    modifiers = Gdk.ModifierType(state)
-                    if (modifiers & Gdk.ModifierType.CONTROL_MASK) and (modifiers & Gdk.ModifierType.ALT_MASK):
+                    ctrl = state & CONTROL_MASK
+                    alt = state & ALT_MASK
+                    if ctrl and alt:
                         # Ctrl+Alt combo
-                        self.execute_command(f"xdotool key ctrl+alt+{char.lower()}")
-                    elif modifiers & Gdk.ModifierType.CONTROL_MASK:
+                        self.app.xdo.key(f"ctrl+alt+{char.lower()}")
+                    elif ctrl:
                         # Ctrl combo
-                        self.execute_command(f"xdotool key ctrl+{char.lower()}")
-                    elif modifiers & Gdk.ModifierType.ALT_MASK:  # ALT_MASK for Alt
+                        self.app.xdo.key(f"ctrl+{char.lower()}")
+                    elif alt:
                         # Alt combo
-                        self.execute_command(f"xdotool key alt+{char.lower()}")
+                        self.app.xdo.key(f"alt+{char.lower()}")
                     else:
                         # Regular character
-                        self.execute_command(f"xdotool type '{char}'")
+                        self.app.xdo.type(char)
                 else:
                     print(f"Unhandled key: {keyname}")
         except Exception as e:
@@ -75,25 +85,15 @@ class KeyboardEmulator:
             keyname = Gdk.keyval_name(keyval)
 
             # Handle modifier key releases
-            if keyname in ['Control_L', 'Control_R', 'Alt_L', 'Alt_R', 'Shift_L', 'Shift_R', 'Super_L', 'Super_R']:
-                modifier_map = {
-                    'Control_L': 'ctrl', 'Control_R': 'ctrl',
-                    'Alt_L': 'alt', 'Alt_R': 'alt',
-                    'Shift_L': 'shift', 'Shift_R': 'shift',
-                    'Super_L': 'super', 'Super_R': 'super'
-                }
+            if keyname in MODIFIER_MAP:
+                modifier = MODIFIER_MAP[keyname]
 
-                # Release the modifier key
-                self.active_modifiers[modifier_map[keyname]] = False
-                self.execute_command(f"xdotool keyup {modifier_map[keyname]}")
+                # Release the modifier key, only if its press was forwarded, so
+                # releases still go through after leaving the input tab
+                if self.active_modifiers[modifier]:
+                    self.active_modifiers[modifier] = False
+                    self.app.xdo.key_up(modifier)
         except Exception as e:
             print(f"Error on key release: {str(e)}")
 
         return False
-
-    def execute_command(self, command):
-        """Execute an xdotool command"""
-        try:
-            subprocess.Popen(command, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except Exception as e:
-            print(f"Command error: {str(e)}")
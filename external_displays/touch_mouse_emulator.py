@@ -7,7 +7,7 @@
 import gi
 gi.require_version('Gtk', '4.0')
 from gi.repository import Gtk, GLib
-import subprocess
+import cairo
 import time
 
 class TouchMouseEmulator:
@@ -19,6 +19,8 @@ class TouchMouseEmulator:
 
         # Movement threshold to prevent accidental clicks
         self.movement_threshold = 10.0  # Pixels of movement required to consider it a drag, not a tap
+        # Distances are compared squared, so no square roots per drag update
+        self.movement_threshold_sq = self.movement_threshold ** 2
 
         # Flag to track if we've moved enough to consider it a drag
         self.has_moved_threshold = False
@@ -30,6 +32,10 @@ class TouchMouseEmulator:
         self.touch_x = 0
         self.touch_y = 0
 
+        # Last touch point a drag moved from, set on press and drag begin
+        self.last_x = 0.0
+        self.last_y = 0.0
+
         # Setup controllers for input events
         self.gesture_click = Gtk.GestureClick.new()
         self.gesture_click.set_button(0)
@@ -47,26 +53,57 @@ class TouchMouseEmulator:
         self.touch_controller = Gtk.GestureZoom.new()
         self.touch_controller.connect("begin", self.on_zoom_begin)
         self.touch_controller.connect("scale-changed", self.on_zoom_scale_changed)
+        self.touch_controller.connect("end", self.on_zoom_end)
         self.drawing_area.add_controller(self.touch_controller)
 
         # Motion controller for mouse movement
         self.motion_controller = Gtk.EventControllerMotion.new()
         self.drawing_area.add_controller(self.motion_controller)
 
-        self.mouse_start_x = 0
-        self.mouse_start_y = 0
         self.is_dragging = False
         self.drag_start_pos = None
         self.last_touch_time = 0
         self.touch_hold_timer = None
         self.active_touches = {}
         self.last_scale = 1.0
+        # Latest pinch scale, scrolled at most once per frame by flush_scroll
+        self.zoom_scale = 1.0
+        self.scroll_source_id = None
 
-        # Add a cumulative movement tracker for drag detection
-        self.total_movement = 0.0
+        # Background and guides only depend on the size and scale, so they're
+        # rasterized once into an image surface and blitted on every frame
+        self.guides_surface = None
+        self.guides_pattern = None
+        self.guides_size = None
 
     def on_draw(self, area, cr, width, height):
         """Draw the touch area with guides"""
+        # The draw target is a recording surface, a similar surface would just
+        # replay the guide paths, so rasterize them at the device scale instead
+        scale = area.get_scale_factor()
+        if self.guides_size != (width, height, scale):
+            self.guides_surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width * scale, height * scale)
+            self.guides_surface.set_device_scale(scale, scale)
+            self.draw_guides(cairo.Context(self.guides_surface), width, height)
+            self.guides_pattern = cairo.SurfacePattern(self.guides_surface)
+            self.guides_size = (width, height, scale)
+
+        # Unchanged size: the whole background is one blit of the cached pattern
+        cr.set_source(self.guides_pattern)
+        cr.paint()
+
+        if not self.touch_active:
+            return False
+
+        # Draw touch indicator (should be removed after everything works)
+        cr.set_source_rgb(1.0, 0.0, 0.0)
+        cr.arc(self.touch_x, self.touch_y, 10, 0, 2 * 3.14159)
+        cr.fill()
+
+        return False
+
+    def draw_guides(self, cr, width, height):
+        """Draw the background, grid and center cross"""
         # Draw background
         cr.set_source_rgb(0.9, 0.9, 0.9)
         cr.rectangle(0, 0, width, height)
@@ -76,60 +113,59 @@ class TouchMouseEmulator:
         cr.set_source_rgb(0.8, 0.8, 0.8)
         cr.set_line_width(1)
 
+        # All grid lines go in one path and one stroke, steps are at least a
+        # pixel so a tiny area doesn't give range() a zero step
+        step_x = max(1, width // 10)
+        step_y = max(1, height // 10)
+
         # Vertical lines
-        for x in range(0, width, width // 10):
+        for x in range(0, width, step_x):
             cr.move_to(x, 0)
             cr.line_to(x, height)
-            cr.stroke()
 
         # Horizontal lines
-        for y in range(0, height, height // 10):
+        for y in range(0, height, step_y):
             cr.move_to(0, y)
             cr.line_to(width, y)
-            cr.stroke()
+        cr.stroke()
 
         # Draw center cross
         cr.set_source_rgb(0.5, 0.5, 0.5)
         cr.set_line_width(2)
         cr.move_to(width / 2 - 20, height / 2)
         cr.line_to(width / 2 + 20, height / 2)
-        cr.stroke()
         cr.move_to(width / 2, height / 2 - 20)
         cr.line_to(width / 2, height / 2 + 20)
         cr.stroke()
 
-        # Draw touch indicator (should be removed after everything works)
-        if self.touch_active:
-            cr.set_source_rgb(1.0, 0.0, 0.0)
-            cr.arc(self.touch_x, self.touch_y, 10, 0, 2 * 3.14159)
-            cr.fill()
+    def update_indicator(self, active, x, y):
+        """Move the touch indicator, only redrawing when it visibly changes"""
+        # GTK4 has no partial invalidation, so skip redraws that would paint the same frame
+        changed = active != self.touch_active or (
+            active and (int(x), int(y)) != (int(self.touch_x), int(self.touch_y)))
 
-        return False
+        self.touch_active = active
+        self.touch_x = x
+        self.touch_y = y
+
+        if changed:
+            self.drawing_area.queue_draw()
 
     def on_press(self, gesture, n_press, x, y):
         button = gesture.get_current_button()
 
         # Set touch indicator
-        self.touch_active = True
-        self.touch_x = x
-        self.touch_y = y
-        self.drawing_area.queue_draw()
+        self.update_indicator(True, x, y)
 
         # Reset movement tracking on press
         self.has_moved_threshold = False
-        self.total_movement = 0.0
 
         # Handle mouse button press events
         if button == 1:  # Left button
-            # Get current mouse position on target display
-            mouse_pos = self.get_current_mouse_position()
-            self.mouse_start_x = mouse_pos[0]
-            self.mouse_start_y = mouse_pos[1]
-
             # Check for double click
             current_time = time.time()
             if n_press == 2:
-                subprocess.run("xdotool click --repeat 2 1", shell=True)
+                self.app.xdo.click(1, 2)
                 self.last_touch_time = 0
             else:
                 self.last_touch_time = current_time
@@ -143,13 +179,12 @@ class TouchMouseEmulator:
                     GLib.source_remove(self.touch_hold_timer)
                 self.touch_hold_timer = GLib.timeout_add(300, self.on_touch_hold)
         elif button == 3:  # Right button
-            subprocess.run("xdotool click 3", shell=True)
+            self.app.xdo.click(3)
 
     def on_release(self, gesture, n_press, x, y):
         button = gesture.get_current_button()
 
-        self.touch_active = False
-        self.drawing_area.queue_draw()
+        self.update_indicator(False, self.touch_x, self.touch_y)
 
         # Cancel hold timer if active
         if self.touch_hold_timer:
@@ -164,10 +199,10 @@ class TouchMouseEmulator:
             # 3. We're not in gesture drag mode
             if not self.has_moved_threshold and not self.is_dragging and not self.is_gesture_dragging:
                 # Simple click
-                subprocess.run("xdotool click 1", shell=True)
+                self.app.xdo.click(1)
             # End drag if we were dragging
             elif self.is_dragging:
-                subprocess.run("xdotool mouseup 1", shell=True)
+                self.app.xdo.mouse_up(1)
                 self.is_dragging = False
 
         # Clean up state
@@ -175,14 +210,13 @@ class TouchMouseEmulator:
 
         # Reset movement tracking
         self.has_moved_threshold = False
-        self.total_movement = 0.0
 
     def on_touch_hold(self):
         """Called when touch is held long enough for drag"""
         # Only start drag if we haven't moved much (to prevent accidental drags)
         if not self.has_moved_threshold:
             # Start drag operation where the cursor currently is
-            subprocess.run("xdotool mousedown 1", shell=True)
+            self.app.xdo.mouse_down(1)
             self.is_dragging = True
 
         self.touch_hold_timer = None
@@ -193,18 +227,13 @@ class TouchMouseEmulator:
         self.drag_start_pos = (start_x, start_y)
         self.is_gesture_dragging = True
 
-        self.touch_active = True
-        self.touch_x = start_x
-        self.touch_y = start_y
+        self.update_indicator(True, start_x, start_y)
 
         self.last_x = start_x
         self.last_y = start_y
 
         # Reset movement tracking
         self.has_moved_threshold = False
-        self.total_movement = 0.0
-
-        self.drawing_area.queue_draw()
 
         # Cancel the hold timer if it's active
         if self.touch_hold_timer:
@@ -218,23 +247,19 @@ class TouchMouseEmulator:
             current_x = start_x + offset_x
             current_y = start_y + offset_y
 
-            self.touch_x = current_x
-            self.touch_y = current_y
+            self.update_indicator(True, current_x, current_y)
 
             # Calculate the delta movement since last update
-            if hasattr(self, 'last_x') and hasattr(self, 'last_y'):
-                delta_x = current_x - self.last_x
-                delta_y = current_y - self.last_y
-            else:
-                delta_x = offset_x
-                delta_y = offset_y
+            delta_x = current_x - self.last_x
+            delta_y = current_y - self.last_y
 
-            # Calculate the total movement
-            total_offset = (offset_x**2 + offset_y**2)**0.5
-            self.total_movement += total_offset
+            # Repeated updates for the same point change nothing
+            if delta_x == 0 and delta_y == 0:
+                return
 
-            # If we've moved enough, mark as a movement, not a tap
-            if self.total_movement > self.movement_threshold and not self.has_moved_threshold:
+            # If we've moved far enough from the start, mark as a movement, not a tap
+            offset_sq = offset_x * offset_x + offset_y * offset_y
+            if offset_sq > self.movement_threshold_sq and not self.has_moved_threshold:
                 self.has_moved_threshold = True
 
                 # Cancel the hold timer if we're moving
@@ -246,8 +271,8 @@ class TouchMouseEmulator:
             self.last_y = current_y
 
             # Scale the delta movement
-            scaled_delta_x = self.scale_delta_x(delta_x, 0)
-            scaled_delta_y = self.scale_delta_y(delta_y, 0)
+            scaled_delta_x = self.scale_delta(delta_x)
+            scaled_delta_y = self.scale_delta(delta_y)
 
             # Skip very small movements
             if abs(scaled_delta_x) < 1 and abs(scaled_delta_y) < 1:
@@ -255,26 +280,22 @@ class TouchMouseEmulator:
 
             # If dragging with button held, move mouse relatively
             if self.is_dragging:
-                self.execute_command(f"xdotool mousemove_relative -- {scaled_delta_x} {scaled_delta_y}")
+                self.app.xdo.mouse_move_relative(scaled_delta_x, scaled_delta_y)
             # Regular mouse movement (not dragging)
             else:
-                self.execute_command(f"xdotool mousemove_relative -- {scaled_delta_x} {scaled_delta_y}")
-            self.drawing_area.queue_draw()
+                self.app.xdo.mouse_move_relative(scaled_delta_x, scaled_delta_y)
 
     def on_drag_end(self, gesture, offset_x, offset_y):
-        self.touch_active = False
-        self.drawing_area.queue_draw()
-
-        # Calculate total movement distance
-        total_distance = (offset_x**2 + offset_y**2)**0.5
+        self.update_indicator(False, self.touch_x, self.touch_y)
 
-        # Mark as moved if distance is significant (ensure click doesn't happen after drag)
-        if total_distance > self.movement_threshold / 2:
+        # Mark as moved if distance is significant (ensure click doesn't happen after drag),
+        # half the threshold is a quarter of it squared
+        if offset_x * offset_x + offset_y * offset_y > self.movement_threshold_sq / 4:
             self.has_moved_threshold = True
 
         # If this was a drag operation, clean up
         if self.is_dragging:
-            self.execute_command("xdotool mouseup 1")
+            self.app.xdo.mouse_up(1)
             self.is_dragging = False
 
         # Reset this gesture state
@@ -282,63 +303,45 @@ class TouchMouseEmulator:
         self.drag_start_pos = None
 
     def on_zoom_begin(self, gesture, sequence):
-        # Starting two-finger operation
+        # Starting two-finger operation, finish the previous one first
+        self.flush_pending_scroll()
         self.last_scale = 1.0
+        self.zoom_scale = 1.0
+
+    def on_zoom_end(self, gesture, sequence):
+        # Don't lose the last scroll step of a pinch that ends within a frame
+        self.flush_pending_scroll()
+
+    def flush_pending_scroll(self):
+        if self.scroll_source_id is not None:
+            GLib.source_remove(self.scroll_source_id)
+            self.flush_scroll()
 
     def on_zoom_scale_changed(self, gesture, scale):
-        # Handle zoom gestures (for scrolling)
+        # Handle zoom gestures (for scrolling), changes within a frame become one scroll
+        self.zoom_scale = scale
+        if self.scroll_source_id is None:
+            self.scroll_source_id = GLib.timeout_add(16, self.flush_scroll)
+
+    def flush_scroll(self):
+        self.scroll_source_id = None
+        scale = self.zoom_scale
         delta_scale = scale - self.last_scale
 
         if abs(delta_scale) > 0.05:  # Threshold to avoid jitter
-            scroll_direction = 'down' if delta_scale < 0 else 'up'
             scroll_amount = min(abs(int(delta_scale * 10)), 5)
+            # Button 4 when pinching in, 5 when spreading out
+            scroll_button = 5 - (delta_scale < 0)
 
             if scroll_amount > 0:
-                self.execute_command(f"xdotool click --repeat {scroll_amount} {4 if scroll_direction == 'down' else 5}")
+                self.app.xdo.click(scroll_button, scroll_amount)
             self.last_scale = scale
+        return GLib.SOURCE_REMOVE
 
-    def scale_delta_x(self, delta_x, width):
-        """Scale x delta movement from the drawing area to the target display"""
-        if delta_x == 0:
-            return 0
-
-        # Claude seems to think this is a good idea
-        scaled = delta_x * self.sensitivity
-
-        if abs(scaled) > 50:
-            return 50 if scaled > 0 else -50
-
-        return int(scaled)
-
-    def scale_delta_y(self, delta_y, height):
-        """Scale y delta movement from the drawing area to the target display"""
-
-        if delta_y == 0:
-            return 0
-
-        scaled = delta_y * self.sensitivity
-
-        if abs(scaled) > 50:
-            return 50 if scaled > 0 else -50
-
-        return int(scaled)
-
-    def get_current_mouse_position(self):
-        """Get current mouse position on target display"""
-        try:
-            # Get mouse position using the current display setting
-            result = subprocess.run(['xdotool', 'getmouselocation'], capture_output=True, text=True)
-
-            # Parse position
-            # Output format: x:123 y:456 screen:0 window:12345
-            parts = result.stdout.split()
-            x = int(parts[0].split(':')[1])
-            y = int(parts[1].split(':')[1])
-
-            return (x, y)
-        except Exception as e:
-            print(f"Error getting mouse position: {str(e)}")
-            return (0, 0)
+    def scale_delta(self, delta):
+        """Scale a delta movement from the drawing area to the target display"""
+        # Both axes scale the same, clamped to 50 pixels per update
+        return max(-50, min(50, int(delta * self.sensitivity)))
 
     def clear_touch_state(self):
         """Reset all touch tracking state"""
@@ -349,13 +352,5 @@ class TouchMouseEmulator:
             self.touch_hold_timer = None
 
         if self.is_dragging:
-            self.execute_command("xdotool mouseup 1")
+            self.app.xdo.mouse_up(1)
             self.is_dragging = False
-
-    def execute_command(self, command):
-        """Execute an xdotool command on the target display"""
-        try:
-            subprocess.Popen(command, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except Exception as e:
-            print(f"Command error: {str(e)}")
-            self.clear_touch_state()
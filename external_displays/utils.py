@@ -6,67 +6,70 @@
 
 import os
 import time
+import functools
+import select
+import socket
+import struct
 import gi
 from gi.repository import Gio, GLib
 from external_displays.edid import get_display_info
 
+NETLINK_KOBJECT_UEVENT = 15
+# Multicast group udev rebroadcasts events on once its rules have run
+UDEV_MONITOR_GROUP = 2
+
+@functools.lru_cache(maxsize=None)
+def get_settings(schema_id):
+    """Return a shared Gio.Settings for schema_id, or None if it isn't installed"""
+    source = Gio.SettingsSchemaSource.get_default()
+    if not source or not source.lookup(schema_id, True):
+        print(f"GSettings schema {schema_id} not installed")
+        return None
+    return Gio.Settings.new(schema_id)
+
 def get_systemd_bus(system_bus=False):
     if system_bus:
         return Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
     else:
         return Gio.bus_get_sync(Gio.BusType.SESSION, None)
 
-def check_service_status(service_name, system_bus=False):
-    try:
-        bus = get_systemd_bus(system_bus)
-        systemd_object = Gio.DBusProxy.new_sync(
-            bus,
-            Gio.DBusProxyFlags.NONE,
-            None,
-            'org.freedesktop.systemd1',
-            '/org/freedesktop/systemd1',
-            'org.freedesktop.systemd1.Manager',
-            None
-        )
+@functools.lru_cache(maxsize=None)
+def get_systemd_manager(system_bus=False):
+    """Return a shared proxy for the systemd manager, it is only used for method calls"""
+    return Gio.DBusProxy.new_sync(
+        get_systemd_bus(system_bus),
+        Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES | Gio.DBusProxyFlags.DO_NOT_CONNECT_SIGNALS,
+        None,
+        'org.freedesktop.systemd1',
+        '/org/freedesktop/systemd1',
+        'org.freedesktop.systemd1.Manager',
+        None
+    )
 
-        unit_path = systemd_object.call_sync(
-            'GetUnit',
-            GLib.Variant('(s)', (service_name,)),
+def check_services_status(service_names, system_bus=False):
+    """Return which of the given services are active, using a single D-Bus call"""
+    try:
+        units = get_systemd_manager(system_bus).call_sync(
+            'ListUnitsByNames',
+            GLib.Variant('(as)', (list(service_names),)),
             Gio.DBusCallFlags.NONE,
             -1,
             None
         ).unpack()[0]
 
-        unit_object = Gio.DBusProxy.new_sync(
-            bus,
-            Gio.DBusProxyFlags.NONE,
-            None,
-            'org.freedesktop.systemd1',
-            unit_path,
-            'org.freedesktop.systemd1.Unit',
-            None
-        )
-
-        active_state = unit_object.get_cached_property('ActiveState').get_string()
-        return active_state == 'active'
+        # Units come back in request order, match them up by position since
+        # systemd reports the canonical name for aliases
+        return {name: unit[3] == 'active' for name, unit in zip(service_names, units)}
     except GLib.Error as e:
-        if 'NoSuchUnit' in str(e):
-            return False
-        print(f"Error checking {service_name} status: {e}")
-        return False
+        print(f"Error checking {', '.join(service_names)} status: {e}")
+        return dict.fromkeys(service_names, False)
+
+def check_service_status(service_name, system_bus=False):
+    return check_services_status((service_name,), system_bus)[service_name]
 
 def start_service(service_name, system_bus=False):
     try:
-        bus = get_systemd_bus(system_bus)
-        systemd_object = Gio.DBusProxy.new_sync(
-            bus,
-            Gio.DBusProxyFlags.NONE,
-            None,
-            'org.freedesktop.systemd1',
-            '/org/freedesktop/systemd1',
-            'org.freedesktop.systemd1.Manager',
-            None
-        )
+        systemd_object = get_systemd_manager(system_bus)
 
         systemd_object.call_sync(
             'StartUnit',
@@ -83,16 +86,7 @@ def start_service(service_name, system_bus=False):
 def stop_service(service_name, system_bus=False):
     """Stop a systemd service using D-Bus"""
     try:
-        bus = get_systemd_bus(system_bus)
-        systemd_object = Gio.DBusProxy.new_sync(
-            bus,
-            Gio.DBusProxyFlags.NONE,
-            None,
-            'org.freedesktop.systemd1',
-            '/org/freedesktop/systemd1',
-            'org.freedesktop.systemd1.Manager',
-            None
-        )
+        systemd_object = get_systemd_manager(system_bus)
 
         systemd_object.call_sync(
             'StopUnit',
@@ -106,19 +100,69 @@ def stop_service(service_name, system_bus=False):
         print(f"Error stopping {service_name}: {e}")
         return False
 
+def wait_for_uevent_condition(check, timeout=30):
+    """Wait until check() returns True, rechecking whenever a uevent arrives"""
+    # Open the monitor before the first check so no event can slip in between
+    sock = open_uevent_monitor()
+    deadline = time.monotonic() + timeout
+    try:
+        while not check():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            if sock is None:
+                time.sleep(min(remaining, 0.5))
+                continue
+
+            # Still recheck now and then in case udev isn't rebroadcasting
+            select.select([sock], [], [], min(remaining, 1))
+            while True:
+                try:
+                    sock.recv(8192)
+                except BlockingIOError:
+                    break
+        return True
+    finally:
+        if sock is not None:
+            sock.close()
+
 def wait_for_file(path, timeout=30):
-    start_time = time.time()
-    while not os.path.exists(path):
-        if time.time() - start_time > timeout:
-            return False
-        time.sleep(0.5)
-    return True
+    return wait_for_uevent_condition(lambda: os.path.exists(path), timeout)
 
 def wait_for_display_connected(card_path, connector, timeout=30):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        display_info = get_display_info(card_path, connector)
-        if display_info.get('status') == 'connected':
-            return True
-        time.sleep(1)
-    return False
+    return wait_for_uevent_condition(
+        lambda: get_display_info(card_path, connector).status == 'connected',
+        timeout
+    )
+
+def open_uevent_monitor():
+    """Open a non-blocking netlink socket that receives udev processed uevents"""
+    try:
+        sock = socket.socket(
+            socket.AF_NETLINK,
+            socket.SOCK_DGRAM | socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC,
+            NETLINK_KOBJECT_UEVENT
+        )
+        sock.bind((0, UDEV_MONITOR_GROUP))
+        return sock
+    except OSError as e:
+        print(f"Error opening uevent monitor: {e}")
+        return None
+
+def parse_uevent(data):
+    """Parse a libudev framed or raw kernel uevent message into a dict"""
+    if data.startswith(b'libudev\0'):
+        # prefix[8], magic, header_size, properties_off, properties_len, ...
+        properties_off, properties_len = struct.unpack_from('=II', data, 16)
+        data = data[properties_off:properties_off + properties_len]
+    else:
+        # Kernel messages start with an "ACTION@DEVPATH" summary line
+        data = data.partition(b'\0')[2]
+
+    event = {}
+    for field in data.split(b'\0'):
+        key, sep, value = field.partition(b'=')
+        if sep:
+            event[key.decode(errors='replace')] = value.decode(errors='replace')
+    return event
@@ -0,0 +1,166 @@
+# SPDX-License-Identifier: GPL-2.0
+# Copyright (C) 2025 Furi Labs
+#
+# Authors:
+# Bardia Moshiri <bardia@furilabs.com>
+
+import os
+import ctypes
+import ctypes.util
+import shutil
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Send to whatever window has focus, like the xdotool command line does
+CURRENTWINDOW = 0
+# Same pause between key events as the xdotool command line default
+KEY_DELAY = 12000
+# Same pause between repeated clicks as xdotool click --repeat
+CLICK_DELAY = 100000
+
+def load_libxdo():
+    """Load libxdo and declare the functions we call, returns None if it's missing"""
+    for name in ('libxdo.so.3', ctypes.util.find_library('xdo')):
+        if not name:
+            continue
+        try:
+            lib = ctypes.CDLL(name)
+            break
+        except OSError:
+            continue
+    else:
+        print("libxdo not found, falling back to the xdotool command")
+        return None
+
+    xdo_p = ctypes.c_void_p
+    window = ctypes.c_ulong
+    lib.xdo_new.argtypes = [ctypes.c_char_p]
+    lib.xdo_new.restype = xdo_p
+    lib.xdo_free.argtypes = [xdo_p]
+    lib.xdo_free.restype = None
+    for func in (lib.xdo_send_keysequence_window,
+                 lib.xdo_send_keysequence_window_down,
+                 lib.xdo_send_keysequence_window_up,
+                 lib.xdo_enter_text_window):
+        func.argtypes = [xdo_p, window, ctypes.c_char_p, ctypes.c_uint]
+    lib.xdo_move_mouse_relative.argtypes = [xdo_p, ctypes.c_int, ctypes.c_int]
+    lib.xdo_click_window_multiple.argtypes = [xdo_p, window, ctypes.c_int, ctypes.c_int, ctypes.c_uint]
+    lib.xdo_mouse_down.argtypes = [xdo_p, window, ctypes.c_int]
+    lib.xdo_mouse_up.argtypes = [xdo_p, window, ctypes.c_int]
+    return lib
+
+class Xdo:
+    """xdotool actions run in process through libxdo, in order on one worker thread"""
+    def __init__(self):
+        self.lib = load_libxdo()
+        self.xdo = None
+        # subprocess only takes its posix_spawn fast path for an absolute path
+        self.xdotool_path = shutil.which("xdotool") or "xdotool"
+        self.display_name = None
+        # libxdo sleeps between key events, keep that off the main loop
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        # Text or moves sent while the worker is busy join the last queued call
+        # of the same kind, pending is the batch that call will send
+        self.lock = threading.Lock()
+        self.pending = None
+        self.pending_flush = None
+
+    def get_xdo(self):
+        # The target display can be changed from the settings sheet
+        display_name = os.environ.get('DISPLAY')
+        if self.xdo is None or display_name != self.display_name:
+            if self.xdo is not None:
+                self.lib.xdo_free(self.xdo)
+            self.xdo = self.lib.xdo_new(display_name.encode() if display_name else None)
+            self.display_name = display_name
+            if not self.xdo:
+                self.xdo = None
+                raise OSError(f"Can't open display {display_name}")
+        return self.xdo
+
+    def submit(self, func, *args):
+        # Anything queued after a batch has to run after it, so close the batch
+        with self.lock:
+            self.pending = None
+        return self.executor.submit(self.run, func, *args)
+
+    def batch(self, flush, item):
+        with self.lock:
+            if self.pending is not None and self.pending_flush == flush:
+                self.pending.append(item)
+                return
+            pending = self.pending = [item]
+            self.pending_flush = flush
+        self.executor.submit(self.run, flush, pending)
+
+    def take_batch(self, pending):
+        with self.lock:
+            if self.pending is pending:
+                self.pending = None
+            return list(pending)
+
+    def run(self, func, *args):
+        try:
+            return func(*args)
+        except Exception as e:
+            print(f"xdo error: {e}")
+            return None
+
+    def call(self, name, *args):
+        return getattr(self.lib, name)(self.get_xdo(), *args)
+
+    def xdotool(self, *args):
+        subprocess.run([self.xdotool_path, *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, close_fds=False)
+
+    def key(self, keys):
+        if self.lib is None:
+            return self.submit(self.xdotool, "key", keys)
+        return self.submit(self.call, "xdo_send_keysequence_window", CURRENTWINDOW, keys.encode(), KEY_DELAY)
+
+    def key_down(self, keys):
+        if self.lib is None:
+            return self.submit(self.xdotool, "keydown", keys)
+        return self.submit(self.call, "xdo_send_keysequence_window_down", CURRENTWINDOW, keys.encode(), KEY_DELAY)
+
+    def key_up(self, keys):
+        if self.lib is None:
+            return self.submit(self.xdotool, "keyup", keys)
+        return self.submit(self.call, "xdo_send_keysequence_window_up", CURRENTWINDOW, keys.encode(), KEY_DELAY)
+
+    def type(self, text):
+        self.batch(self.flush_text, text)
+
+    def flush_text(self, pending):
+        text = ''.join(self.take_batch(pending))
+        if self.lib is None:
+            self.xdotool("type", "--", text)
+        else:
+            self.call("xdo_enter_text_window", CURRENTWINDOW, text.encode(), KEY_DELAY)
+
+    def mouse_move_relative(self, dx, dy):
+        self.batch(self.flush_move, (dx, dy))
+
+    def flush_move(self, pending):
+        moves = self.take_batch(pending)
+        dx = sum(move[0] for move in moves)
+        dy = sum(move[1] for move in moves)
+        if self.lib is None:
+            self.xdotool("mousemove_relative", "--", str(dx), str(dy))
+        else:
+            self.call("xdo_move_mouse_relative", dx, dy)
+
+    def click(self, button, repeat=1):
+        if self.lib is None:
+            return self.submit(self.xdotool, "click", "--repeat", str(repeat), str(button))
+        return self.submit(self.call, "xdo_click_window_multiple", CURRENTWINDOW, button, repeat, CLICK_DELAY)
+
+    def mouse_down(self, button):
+        if self.lib is None:
+            return self.submit(self.xdotool, "mousedown", str(button))
+        return self.submit(self.call, "xdo_mouse_down", CURRENTWINDOW, button)
+
+    def mouse_up(self, button):
+        if self.lib is None:
+            return self.submit(self.xdotool, "mouseup", str(button))
+        return self.submit(self.call, "xdo_mouse_up", CURRENTWINDOW, button)
@@ -13,22 +13,16 @@ import os
 os.environ['GDK_BACKEND'] = 'wayland'
 
 import sys
-import time
-import subprocess
-from asyncio import run, sleep
-from gi.repository import GLib, Gio
+import shutil
+from gi.repository import Gio
 from external_displays import ExternalDisplays
 
 def check_dependencies():
-    try:
-        subprocess.run(["which", "xdotool"], check=True, stdout=subprocess.PIPE)
-    except subprocess.CalledProcessError:
+    if shutil.which("xdotool") is None:
         print("Error: xdotool is not installed")
         sys.exit(1)
 
-async def pump_gtk_events():
-    main_context = GLib.MainContext.default()
-
+def main():
     if len(sys.argv) > 1:
         os.environ['DISPLAY'] = sys.argv[1]
         print(f"Overriding DISPLAY with: {sys.argv[1]}")
@@ -39,25 +33,11 @@ async def pump_gtk_events():
     check_dependencies()
 
     app = ExternalDisplays(application_id="io.furios.ExternalDisplays")
-    app.connect('shutdown', lambda _: exit(0))
-
     Gio.Application.set_default(app)
-    app.register()
-    app.activate()
-
-    frame_time = 1 / (240)
-
-    while True:
-        start_time = time.time()
-
-        while main_context.pending():
-            main_context.iteration(False)
-
-        elapsed = time.time() - start_time
-        remaining = max(0, frame_time - elapsed)
 
-        if remaining > 0:
-            await sleep(remaining)
+    # The GLib main loop blocks in poll() until a source is ready. The display
+    # argument is ours, so don't hand it to GApplication as a file to open
+    return app.run(sys.argv[:1])
 
 if __name__ == "__main__":
-    run(pump_gtk_events())
+    sys.exit(main())